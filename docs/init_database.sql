@@ -45,7 +45,7 @@ CREATE TABLE questions (
     subject NVARCHAR(100) NOT NULL,
     topic NVARCHAR(255) NOT NULL,
     question_text NTEXT NOT NULL,
-    ideal_answer NTEXT NOT NULL,
+    ideal_answer NVARCHAR(MAX) NOT NULL,
     max_marks FLOAT NOT NULL CHECK (max_marks > 0),
     passing_threshold FLOAT DEFAULT 60.0 CHECK (passing_threshold >= 0 AND passing_threshold <= 100),
     difficulty_level NVARCHAR(50) DEFAULT 'intermediate' CHECK (difficulty_level IN ('easy', 'intermediate', 'hard', 'expert')),
@@ -58,9 +58,9 @@ CREATE TABLE key_concepts (
     id INT IDENTITY(1,1) PRIMARY KEY,
     question_id INT NOT NULL,
     concept_name NVARCHAR(255) NOT NULL,
-    concept_description NTEXT NOT NULL,
+    concept_description NVARCHAR(MAX) NOT NULL,
     importance_score FLOAT NOT NULL CHECK (importance_score >= 0 AND importance_score <= 1),
-    keywords NTEXT, -- JSON array of keywords
+    keywords NVARCHAR(MAX), -- JSON array of keywords
     max_points FLOAT NOT NULL CHECK (max_points >= 0),
     extraction_method NVARCHAR(50) DEFAULT 'llm_extracted' CHECK (extraction_method IN ('llm_extracted', 'manual')),
     created_at DATETIME2 DEFAULT GETUTCDATE(),
@@ -85,7 +85,7 @@ CREATE TABLE student_answers (
     answer_id NVARCHAR(255) NOT NULL UNIQUE DEFAULT NEWID(),
     student_id NVARCHAR(255) NOT NULL,
     question_id INT NOT NULL,
-    answer_text NTEXT NOT NULL,
+    answer_text NVARCHAR(MAX) NOT NULL,
     submitted_at DATETIME2 DEFAULT GETUTCDATE(),
     language NVARCHAR(10) DEFAULT 'en',
     word_count INT,
@@ -111,7 +111,7 @@ CREATE TABLE grading_results (
     confidence_score FLOAT NOT NULL CHECK (confidence_score >= 0 AND confidence_score <= 1),
     
     -- Feedback
-    detailed_feedback NTEXT NOT NULL,
+    detailed_feedback NVARCHAR(MAX) NOT NULL,
     strengths NTEXT, -- JSON array
     weaknesses NTEXT, -- JSON array
     suggestions NTEXT, -- JSON array
@@ -0,0 +1,330 @@
+-- =============================================
+-- AI Examiner System Database Upgrade Script
+-- Database: MSSQL Server
+-- Applies incremental schema changes to an existing AIExaminerDB.
+-- Every statement is guarded so the script can be re-run safely.
+-- =============================================
+
+USE AIExaminerDB;
+GO
+
+-- =============================================
+-- Student_Answers: NVARCHAR(MAX) answer text
+-- =============================================
+
+-- NTEXT cannot be used in string functions, computed columns or index
+-- INCLUDE lists; the rewrite moves existing values out of legacy LOB storage
+IF EXISTS (
+    SELECT 1 FROM sys.columns
+    WHERE object_id = OBJECT_ID('Student_Answers')
+      AND name = 'answer_text'
+      AND system_type_id = TYPE_ID('ntext')
+)
+BEGIN
+    ALTER TABLE Student_Answers ALTER COLUMN answer_text NVARCHAR(MAX) NOT NULL;
+    UPDATE Student_Answers SET answer_text = answer_text;
+    PRINT 'Column Student_Answers.answer_text converted to NVARCHAR(MAX).';
+END
+GO
+
+-- =============================================
+-- Student_Answers: persisted word count
+-- =============================================
+
+-- Earlier revisions counted single spaces only; drop that definition (and the
+-- covering index that includes it) so it is re-added below
+IF EXISTS (
+    SELECT 1 FROM sys.computed_columns
+    WHERE object_id = OBJECT_ID('Student_Answers')
+      AND name = 'word_count_calc'
+      AND LOWER(definition) NOT LIKE '%nchar((1))%'
+)
+BEGIN
+    IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_sa_student_qid' AND object_id = OBJECT_ID('Student_Answers'))
+        DROP INDEX ix_sa_student_qid ON Student_Answers;
+    ALTER TABLE Student_Answers DROP COLUMN word_count_calc;
+    PRINT 'Column Student_Answers.word_count_calc dropped for redefinition.';
+END
+GO
+
+-- Word count computed by the engine at ingestion time, so reads never
+-- need to backfill word_count from Python. Tabs and line breaks become
+-- spaces and runs of spaces collapse to one (the NCHAR(1) marker trick), so
+-- the count matches len(answer_text.split()); blank answers count 0
+IF COL_LENGTH('Student_Answers', 'word_count_calc') IS NULL
+BEGIN
+    ALTER TABLE Student_Answers
+        ADD word_count_calc AS (
+            CASE
+                WHEN LTRIM(RTRIM(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(CAST(answer_text AS NVARCHAR(MAX)),
+                    NCHAR(9), N' '), NCHAR(10), N' '), NCHAR(13), N' '), N' ', N' ' + NCHAR(1)), NCHAR(1) + N' ', N''), NCHAR(1), N''))) = N''
+                THEN 0
+                ELSE LEN(LTRIM(RTRIM(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(CAST(answer_text AS NVARCHAR(MAX)),
+                    NCHAR(9), N' '), NCHAR(10), N' '), NCHAR(13), N' '), N' ', N' ' + NCHAR(1)), NCHAR(1) + N' ', N''), NCHAR(1), N''))))
+                   - LEN(REPLACE(LTRIM(RTRIM(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(CAST(answer_text AS NVARCHAR(MAX)),
+                    NCHAR(9), N' '), NCHAR(10), N' '), NCHAR(13), N' '), N' ', N' ' + NCHAR(1)), NCHAR(1) + N' ', N''), NCHAR(1), N''))), N' ', N''))
+                   + 1
+            END
+        ) PERSISTED;
+    PRINT 'Column Student_Answers.word_count_calc added.';
+END
+GO
+
+-- Earlier revisions hashed the text without collapsing inner whitespace, or
+-- lowercased it; drop that definition (and its index) so it is re-added below
+IF EXISTS (
+    SELECT 1 FROM sys.computed_columns
+    WHERE object_id = OBJECT_ID('Student_Answers')
+      AND name = 'answer_hash'
+      AND (LOWER(definition) NOT LIKE '%nchar((1))%' OR LOWER(definition) LIKE '%lower(%')
+)
+BEGIN
+    IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_sa_qid_answer_hash' AND object_id = OBJECT_ID('Student_Answers'))
+        DROP INDEX ix_sa_qid_answer_hash ON Student_Answers;
+    ALTER TABLE Student_Answers DROP COLUMN answer_hash;
+    PRINT 'Column Student_Answers.answer_hash dropped for redefinition.';
+END
+GO
+
+-- Hash of the normalized answer text, so identical resubmissions to a question
+-- reuse an earlier grading instead of calling the LLM. Normalized like
+-- normalize_text() in src/utils/cache.py: whitespace runs collapsed to one
+-- space and trimmed. Case is kept, since it can carry meaning ("pH", "Co"/"CO")
+IF COL_LENGTH('Student_Answers', 'answer_hash') IS NULL
+BEGIN
+    ALTER TABLE Student_Answers
+        ADD answer_hash AS CAST(HASHBYTES('SHA2_256', LTRIM(RTRIM(
+            REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(CAST(answer_text AS NVARCHAR(MAX)),
+                NCHAR(9), N' '), NCHAR(10), N' '), NCHAR(13), N' '), N' ', N' ' + NCHAR(1)), NCHAR(1) + N' ', N''), NCHAR(1), N'')
+        ))) AS BINARY(32)) PERSISTED;
+    PRINT 'Column Student_Answers.answer_hash added.';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_sa_qid_answer_hash' AND object_id = OBJECT_ID('Student_Answers'))
+BEGIN
+    CREATE INDEX ix_sa_qid_answer_hash ON Student_Answers (question_id, answer_hash);
+    PRINT 'Index ix_sa_qid_answer_hash created.';
+END
+GO
+
+-- =============================================
+-- Question_Bank: precomputed rubric JSON
+-- =============================================
+
+-- Rubric serialized once when the ideal answer is authored and passed to the
+-- grading prompt verbatim
+IF COL_LENGTH('Question_Bank', 'rubric_json') IS NULL
+BEGIN
+    ALTER TABLE Question_Bank ADD rubric_json NVARCHAR(MAX) NULL;
+    PRINT 'Column Question_Bank.rubric_json added.';
+END
+GO
+
+-- One-time backfill from rubric_criteria for questions that have criteria
+UPDATE q
+SET rubric_json = (
+    SELECT
+        q.subject AS subject,
+        q.topic AS topic,
+        JSON_QUERY((
+            SELECT
+                rc.criteria_name AS name,
+                CAST(rc.criteria_description AS NVARCHAR(MAX)) AS description,
+                rc.max_points AS max_points,
+                rc.weight AS weight
+            FROM rubric_criteria rc
+            WHERE rc.question_id = q.id
+            FOR JSON PATH
+        )) AS criteria,
+        q.max_marks AS total_max_points,
+        q.passing_threshold AS passing_threshold
+    FOR JSON PATH, WITHOUT_ARRAY_WRAPPER
+)
+FROM Question_Bank q
+WHERE q.rubric_json IS NULL
+  AND EXISTS (SELECT 1 FROM rubric_criteria rc WHERE rc.question_id = q.id);
+GO
+
+-- =============================================
+-- Question_Bank: ideal answer hash
+-- =============================================
+
+-- NTEXT cannot be passed to CONCAT or HASHBYTES
+IF EXISTS (
+    SELECT 1 FROM sys.columns
+    WHERE object_id = OBJECT_ID('Question_Bank')
+      AND name = 'ideal_answer'
+      AND system_type_id = TYPE_ID('ntext')
+)
+BEGIN
+    ALTER TABLE Question_Bank ALTER COLUMN ideal_answer NVARCHAR(MAX) NOT NULL;
+    UPDATE Question_Bank SET ideal_answer = ideal_answer;
+    PRINT 'Column Question_Bank.ideal_answer converted to NVARCHAR(MAX).';
+END
+GO
+
+-- Earlier revisions hashed the raw or lowercased ideal answer; drop that
+-- definition (and its index) so it is re-added below
+IF EXISTS (
+    SELECT 1 FROM sys.computed_columns
+    WHERE object_id = OBJECT_ID('Question_Bank')
+      AND name = 'ideal_answer_hash'
+      AND (LOWER(definition) NOT LIKE '%nchar((1))%' OR LOWER(definition) LIKE '%lower(%')
+)
+BEGIN
+    IF EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_qb_ideal_answer_hash' AND object_id = OBJECT_ID('Question_Bank'))
+        DROP INDEX ix_qb_ideal_answer_hash ON Question_Bank;
+    ALTER TABLE Question_Bank DROP COLUMN ideal_answer_hash;
+    PRINT 'Column Question_Bank.ideal_answer_hash dropped for redefinition.';
+END
+GO
+
+-- Questions sharing subject, topic and ideal answer reuse each other's key
+-- concepts instead of running a new LLM extraction. The ideal answer is
+-- normalized like answer_hash above
+IF COL_LENGTH('Question_Bank', 'ideal_answer_hash') IS NULL
+BEGIN
+    ALTER TABLE Question_Bank
+        ADD ideal_answer_hash AS CAST(HASHBYTES('SHA2_256', CONCAT(subject, N'|', topic, N'|', LTRIM(RTRIM(
+            REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(CAST(ideal_answer AS NVARCHAR(MAX)),
+                NCHAR(9), N' '), NCHAR(10), N' '), NCHAR(13), N' '), N' ', N' ' + NCHAR(1)), NCHAR(1) + N' ', N''), NCHAR(1), N'')
+        )))) AS BINARY(32)) PERSISTED;
+    PRINT 'Column Question_Bank.ideal_answer_hash added.';
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_qb_ideal_answer_hash' AND object_id = OBJECT_ID('Question_Bank'))
+BEGIN
+    CREATE INDEX ix_qb_ideal_answer_hash ON Question_Bank (ideal_answer_hash);
+    PRINT 'Index ix_qb_ideal_answer_hash created.';
+END
+GO
+
+-- =============================================
+-- grading_results: stored API response
+-- =============================================
+
+-- Response JSON written at grading time, so re-requesting an already graded
+-- answer reads one column instead of joining its concept evaluations
+IF COL_LENGTH('grading_results', 'response_json') IS NULL
+BEGIN
+    ALTER TABLE grading_results ADD response_json NVARCHAR(MAX) NULL;
+    PRINT 'Column grading_results.response_json added.';
+END
+GO
+
+-- =============================================
+-- Covering indexes for the grading hot path
+-- =============================================
+
+-- NTEXT columns cannot appear in an index INCLUDE list; Student_Answers.answer_text
+-- is converted above
+IF EXISTS (
+    SELECT 1 FROM sys.columns
+    WHERE object_id = OBJECT_ID('Question_KeyConcept')
+      AND name IN ('concept_description', 'keywords')
+      AND system_type_id = TYPE_ID('ntext')
+)
+BEGIN
+    ALTER TABLE Question_KeyConcept ALTER COLUMN concept_description NVARCHAR(MAX) NOT NULL;
+    ALTER TABLE Question_KeyConcept ALTER COLUMN keywords NVARCHAR(MAX) NULL;
+    UPDATE Question_KeyConcept SET concept_description = concept_description, keywords = keywords;
+    PRINT 'Columns Question_KeyConcept.concept_description, keywords converted to NVARCHAR(MAX).';
+END
+GO
+
+IF EXISTS (
+    SELECT 1 FROM sys.columns
+    WHERE object_id = OBJECT_ID('grading_results')
+      AND name = 'detailed_feedback'
+      AND system_type_id = TYPE_ID('ntext')
+)
+BEGIN
+    ALTER TABLE grading_results ALTER COLUMN detailed_feedback NVARCHAR(MAX) NOT NULL;
+    UPDATE grading_results SET detailed_feedback = detailed_feedback;
+    PRINT 'Column grading_results.detailed_feedback converted to NVARCHAR(MAX).';
+END
+GO
+
+-- get_student_answer: seek on (student_id, question_id); INCLUDE matches its projection
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_sa_student_qid' AND object_id = OBJECT_ID('Student_Answers'))
+BEGIN
+    CREATE INDEX ix_sa_student_qid ON Student_Answers (student_id, question_id)
+        INCLUDE (id, answer_id, answer_text, language, submitted_at, word_count, word_count_calc);
+    PRINT 'Index ix_sa_student_qid created.';
+END
+GO
+
+-- grade_and_save_result: one grading result per student answer. Answers already
+-- graded more than once are listed and the index is skipped, so no graded data
+-- is removed; resolve the listed rows and re-run the script
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_gr_said' AND object_id = OBJECT_ID('grading_results'))
+BEGIN
+    IF EXISTS (SELECT 1 FROM grading_results GROUP BY student_answer_id HAVING COUNT(*) > 1)
+    BEGIN
+        SELECT student_answer_id, COUNT(*) AS result_count
+        FROM grading_results
+        GROUP BY student_answer_id
+        HAVING COUNT(*) > 1
+        ORDER BY student_answer_id;
+        RAISERROR('Index ix_gr_said not created: the student_answer_id values listed above have more than one grading_results row.', 16, 1);
+    END
+    ELSE
+    BEGIN
+        CREATE UNIQUE INDEX ix_gr_said ON grading_results (student_answer_id)
+            INCLUDE (result_id, total_score, max_possible_score, percentage, passed,
+                     detailed_feedback, processing_time_ms, confidence_score);
+        PRINT 'Index ix_gr_said created.';
+    END
+END
+GO
+
+-- extract_and_save_key_concepts: existing concepts for a question
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_kc_qid' AND object_id = OBJECT_ID('Question_KeyConcept'))
+BEGIN
+    CREATE INDEX ix_kc_qid ON Question_KeyConcept (question_id)
+        INCLUDE (concept_name, concept_description, importance_score, keywords, max_points);
+    PRINT 'Index ix_kc_qid created.';
+END
+GO
+
+-- get_question_with_ideal_answer / get_question_by_id: seek on the public question id
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_qb_qid' AND object_id = OBJECT_ID('Question_Bank'))
+BEGIN
+    CREATE INDEX ix_qb_qid ON Question_Bank (question_id);
+    PRINT 'Index ix_qb_qid created.';
+END
+GO
+
+-- Existing grading results: concept evaluations of one result
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_ce_grid' AND object_id = OBJECT_ID('Concept_Evaluations'))
+BEGIN
+    CREATE INDEX ix_ce_grid ON Concept_Evaluations (grading_result_id)
+        INCLUDE (key_concept_id, points_awarded, points_possible);
+    PRINT 'Index ix_ce_grid created.';
+END
+GO
+
+-- =============================================
+-- grading_results: compressed raw LLM response
+-- =============================================
+
+-- raw_llm_response holds gzip-compressed UTF-16 JSON written by the grading
+-- service; read it with CAST(DECOMPRESS(raw_llm_response) AS NVARCHAR(MAX))
+IF EXISTS (
+    SELECT 1 FROM sys.columns
+    WHERE object_id = OBJECT_ID('grading_results')
+      AND name = 'raw_llm_response'
+      AND system_type_id <> TYPE_ID('varbinary')
+)
+BEGIN
+    ALTER TABLE grading_results ADD raw_llm_response_gz VARBINARY(MAX) NULL;
+    EXEC('UPDATE grading_results
+          SET raw_llm_response_gz = COMPRESS(CAST(raw_llm_response AS NVARCHAR(MAX)))
+          WHERE raw_llm_response IS NOT NULL');
+    ALTER TABLE grading_results DROP COLUMN raw_llm_response;
+    EXEC sp_rename 'grading_results.raw_llm_response_gz', 'raw_llm_response', 'COLUMN';
+    PRINT 'Column grading_results.raw_llm_response converted to compressed VARBINARY(MAX).';
+END
+GO
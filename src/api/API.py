@@ -32,6 +32,7 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize database services on application startup"""
+    grade_service = None
     try:
         from urllib.parse import quote_plus
         
@@ -59,6 +60,16 @@ async def lifespan(app: FastAPI):
         answer_api.set_database_services(db_manager,answer_service)
         grade_api.set_database_services(grade_service)
         
+        if settings.db_pool_warmup:
+            try:
+                await db_manager.warm_up()
+            except Exception as e:
+                logger.warning(f"Database pool warm-up failed: {e}")
+        
+        # Background commits for grading results (GRADING_WRITE_BEHIND)
+        if grade_service.result_writer is not None:
+            grade_service.result_writer.start()
+        
         logger.info("Database services initialized successfully")
         
     except Exception as e:
@@ -69,6 +80,8 @@ async def lifespan(app: FastAPI):
     yield
     
     # Cleanup on shutdown
+    if grade_service is not None and grade_service.result_writer is not None:
+        await grade_service.result_writer.stop()
     logger.info("Application shutdown")
 
 
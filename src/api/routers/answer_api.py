@@ -45,18 +45,10 @@ def check_answer_service():
     """Ensure question service is available; lazily initialize if missing or dead"""
     global ndb_manager, answer_service, rag_service
 
+    # Pooled connections are validated at checkout (pool_pre_ping), so no
+    # per-request probe query is needed once the services exist
     if answer_service and ndb_manager and rag_service:
-        try:
-            session = ndb_manager.get_session()
-            try:
-                session.execute(text("SELECT 1"))
-                return
-            finally:
-                session.close()
-        except Exception:
-            answer_service = None
-            rag_service = None
-            ndb_manager = None  # type: ignore
+        return
 
     try:
         if settings.database_url and settings.database_url.strip():
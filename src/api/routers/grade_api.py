@@ -3,8 +3,9 @@ Database Operations Router
 Handles all MSSQL database-related endpoints and workflow
 """
 import time
+import asyncio
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 
@@ -92,45 +93,63 @@ async def batch_grading_workflow(requests: List[GradingWorkflowRequest]) -> Dict
     """
     check_question_service()
     start_time = time.time()
-    results = []
     successful = 0
     failed = 0
     
     logger.info(f"Starting batch grading workflow for {len(requests)} requests")
     
-    for grading_request in requests:
+    # Group by question so answers to the same question share batched LLM calls
+    by_question: Dict[int, List[int]] = {}
+    for index, grading_request in enumerate(requests):
+        by_question.setdefault(grading_request.question_id, []).append(index)
+    
+    async def grade_question(question_id: int, indexes: List[int]) -> Tuple[List[Any], List[float]]:
+        # Each answer reports the time until its own result was ready; answers that
+        # fail before grading starts report the whole group's time
         request_start = time.time()
+        finished: Dict[int, float] = {}
         try:
-            result = await grade_service.complete_grading_workflow(
-                question_id=grading_request.question_id,
-                student_id=grading_request.student_id
+            outcomes = await grade_service.complete_grading_workflow_batch(
+                question_id=question_id,
+                student_ids=[requests[i].student_id for i in indexes],
+                on_result=lambda j: finished.setdefault(j, time.time())
             )
-            
-            request_time = (time.time() - request_start) * 1000
-            
-            results.append({
-                "student_id": grading_request.student_id,
-                "question_id": grading_request.question_id,
-                "result": result,
-                "processing_time_ms": request_time,
-                "success": True,
-                "error_message": None
-            })
-            successful += 1
-            
         except Exception as e:
-            request_time = (time.time() - request_start) * 1000
-            logger.error(f"Failed batch request for {grading_request.student_id}: {e}")
-            
-            results.append({
-                "student_id": grading_request.student_id,
-                "question_id": grading_request.question_id,
-                "result": None,
-                "processing_time_ms": request_time,
-                "success": False,
-                "error_message": str(e)
-            })
-            failed += 1
+            outcomes = [e] * len(indexes)
+        request_end = time.time()
+        return outcomes, [(finished.get(j, request_end) - request_start) * 1000 for j in range(len(indexes))]
+    
+    # Questions are graded concurrently; grading_semaphore and llm_concurrency
+    # bound how many gradings and LLM calls are actually in flight
+    question_outcomes = await asyncio.gather(
+        *(grade_question(question_id, indexes) for question_id, indexes in by_question.items())
+    )
+    
+    results: List[Dict[str, Any]] = [None] * len(requests)  # type: ignore
+    for indexes, (outcomes, request_times) in zip(by_question.values(), question_outcomes):
+        for index, outcome, request_time in zip(indexes, outcomes, request_times):
+            grading_request = requests[index]
+            if isinstance(outcome, Exception):
+                logger.error(f"Failed batch request for {grading_request.student_id}: {outcome}")
+                results[index] = {
+                    "student_id": grading_request.student_id,
+                    "question_id": grading_request.question_id,
+                    "result": None,
+                    "processing_time_ms": request_time,
+                    "success": False,
+                    "error_message": str(outcome)
+                }
+                failed += 1
+            else:
+                results[index] = {
+                    "student_id": grading_request.student_id,
+                    "question_id": grading_request.question_id,
+                    "result": outcome,
+                    "processing_time_ms": request_time,
+                    "success": True,
+                    "error_message": None
+                }
+                successful += 1
     
     total_time = (time.time() - start_time) * 1000
     
@@ -3,10 +3,12 @@ LLM Operations Router
 Handles all LLM-related endpoints for AI grading (in-memory, no database)
 """
 import time
+import orjson
 import logging
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, List
 
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 
 from src.models.schemas import (
     GradingRequest, GradingResponse, BatchGradingRequest, BatchGradingResponse,
@@ -349,16 +351,17 @@ async def grade_answer(request: GradingRequest) -> GradingResponse:
 
 ######################## 6. Batch grade
 @router.post("/grade/batch", response_model=BatchGradingResponse)
-async def batch_grade_answers(request: BatchGradingRequest) -> BatchGradingResponse:
+async def batch_grade_answers(request: BatchGradingRequest, latency_sensitive: bool = True) -> BatchGradingResponse:
     """
     6. Batch grade
     - Grade multiple student answers in batch (in-memory processing)
     - Efficiently processes multiple grading requests in parallel while maintaining individual error handling for each request. Does not require database.
+    - latency_sensitive=false lets large batches run as a cheaper offline batch job (may take up to 24h)
     """
     logger.info(f"LLM batch grading request received for {len(request.requests)} answers")
     
     try:
-        result = await gradeService.batch_grade(request)
+        result = await gradeService.batch_grade_offline(request, latency_sensitive=latency_sensitive)
         
         logger.info(
             f"LLM batch grading completed: {result.total_successful} successful, "
@@ -375,3 +378,20 @@ async def batch_grade_answers(request: BatchGradingRequest) -> BatchGradingRespo
         )
 ########################
 
+
+######################## 7. Batch grade (streaming)
+@router.post("/grade/batch/stream")
+async def batch_grade_answers_stream(request: BatchGradingRequest) -> StreamingResponse:
+    """
+    7. Batch grade (streaming)
+    - Same grading as /grade/batch, but each result is streamed as newline-delimited JSON as soon as it finishes
+    - Each line is a GradingResponse with an extra "index" field giving its position in the request
+    """
+    logger.info(f"LLM streaming batch grading request received for {len(request.requests)} answers")
+    
+    async def ndjson() -> AsyncIterator[bytes]:
+        async for index, response in gradeService.batch_grade_stream(request):
+            yield orjson.dumps({"index": index, **response.model_dump(mode="json")}) + b"\n"
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+########################
@@ -2,6 +2,7 @@
 Question Operations Router: Handles all MSSQL question-related endpoints and workflow
 """
 import time
+import asyncio
 import logging
 from typing import Dict, Any, List
 from fastapi import APIRouter, HTTPException
@@ -9,7 +10,7 @@ from urllib.parse import quote_plus
 from sqlalchemy import text
 
 from src.models.question_model import Question
-from src.utils.database_manager import DatabaseManager
+from src.utils.database_manager import DatabaseManager, JSONText
 from src.services.question_service import QuestionService
 from src.services.rag_service import RAGService
 from src.utils.config import settings
@@ -40,18 +41,10 @@ def check_question_service():
     """Ensure question service is available; lazily initialize if missing or dead"""
     global ndb_manager, question_service, rag_service
 
+    # Pooled connections are validated at checkout (pool_pre_ping), so no
+    # per-request probe query is needed once the services exist
     if question_service and ndb_manager and rag_service:
-        try:
-            session = ndb_manager.get_session()
-            try:
-                session.execute(text("SELECT 1"))
-                return
-            finally:
-                session.close()
-        except Exception:
-            question_service = None # type: ignore
-            rag_service = None # type: ignore
-            ndb_manager = None  # type: ignore
+        return
 
     try:
         if settings.database_url and settings.database_url.strip():
@@ -130,15 +123,15 @@ async def get_question_concepts(question_id: int) -> Dict[str, Any]:
     
     try:
         # Get key concepts from database
-        session = ndb_manager.get_session()
+        session = ndb_manager.get_async_session()
         try:
             sql = text("""
                 SELECT key_id, concept_name, concept_description, importance_score, keywords, max_points, created_at
                 FROM Question_KeyConcept 
                 WHERE question_id = :question_id
                 ORDER BY importance_score DESC, created_at ASC
-            """)
-            rows = session.execute(sql, {"question_id": question_id}).fetchall()
+            """).columns(keywords=JSONText)
+            rows = (await session.execute(sql, {"question_id": question_id})).fetchall()
             
             if not rows:
                 raise HTTPException(
@@ -168,7 +161,7 @@ async def get_question_concepts(question_id: int) -> Dict[str, Any]:
             }
             
         finally:
-            session.close()
+            await session.close()
             
     except HTTPException:
         raise
@@ -215,4 +208,40 @@ async def extract_and_save_concepts(question_id: int) -> Dict[str, Any]:
         logger.error(f"Error extracting concepts for question {question_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.post("/extract-concepts")
+async def bulk_extract_and_save_concepts(question_ids: List[int]) -> Dict[str, Any]:
+    """Step 2 for many questions at once, e.g. after importing a question set"""
+    check_question_service()
+    
+    try:
+        start_time = time.time()
+        questions = await asyncio.gather(
+            *(rag_service.get_question_with_ideal_answer(question_id) for question_id in question_ids)
+        )
+        found = [question for question in questions if question]
+        outcomes = await rag_service.bulk_extract_and_save_key_concepts(found)
+        processing_time = (time.time() - start_time) * 1000
+        
+        results = []
+        for question_id in question_ids:
+            outcome = outcomes.get(question_id)
+            if outcome is None:
+                results.append({"question_id": question_id, "concepts_count": 0, "status": "not_found"})
+            elif isinstance(outcome, Exception):
+                results.append({"question_id": question_id, "concepts_count": 0, "status": "failed", "error_message": str(outcome)})
+            else:
+                results.append({"question_id": question_id, "concepts_count": len(outcome), "status": "completed"})
+        
+        return {
+            "results": results,
+            "total_processed": len(question_ids),
+            "total_successful": sum(1 for r in results if r["status"] == "completed"),
+            "processing_time_ms": processing_time
+        }
+        
+    except Exception as e:
+        logger.error(f"Error extracting concepts for {len(question_ids)} questions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 ################################################
\ No newline at end of file
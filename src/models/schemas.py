@@ -2,7 +2,8 @@
 Pydantic models for the AI Examiner System
 """
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from functools import cached_property
+from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 from pydantic import BaseModel, Field, validator
 
@@ -253,6 +254,25 @@ class GradingRubric(BaseModel):
             if abs(v - calculated_total) > 0.01:  # Allow for small floating point differences
                 raise ValueError("total_max_points must equal sum of criteria max_points")
         return v
+    
+    @cached_property
+    def rubric_dict(self) -> Dict[str, Any]:
+        """Rubric in the dict form sent to the LLM, built once per rubric instance"""
+        return {
+            "subject": self.subject,
+            "topic": self.topic,
+            "criteria": [
+                {
+                    "name": criterion.name,
+                    "description": criterion.description,
+                    "max_points": criterion.max_points,
+                    "weight": criterion.weight
+                }
+                for criterion in self.criteria
+            ],
+            "total_max_points": self.total_max_points,
+            "passing_threshold": self.passing_threshold
+        }
 
 
 class KeyConcept(BaseModel):
@@ -261,6 +281,16 @@ class KeyConcept(BaseModel):
     importance: float = Field(..., ge=0, le=1, description="Importance score (0-1)")
     keywords: List[str] = Field(default=[], description="Associated keywords")
     explanation: str = Field(..., description="Detailed explanation of the concept")
+    
+    @cached_property
+    def prompt_dict(self) -> Dict[str, Any]:
+        """Concept in the dict form sent to the LLM, built once per concept instance"""
+        return {
+            "concept": self.concept,
+            "importance": self.importance,
+            "keywords": self.keywords,
+            "explanation": self.explanation
+        }
 
 
 class IdealAnswer(BaseModel):
@@ -270,6 +300,7 @@ class IdealAnswer(BaseModel):
     content: str = Field(..., min_length=10, description="The ideal answer content")
     key_concepts: List[KeyConcept] = Field(default=[], description="Extracted key concepts")
     rubric: GradingRubric = Field(..., description="Grading rubric for this answer")
+    rubric_json: Optional[str] = Field(None, description="Pre-serialized rubric passed to the LLM as-is")
     subject: str = Field(..., description="Academic subject")
     difficulty_level: str = Field(default="intermediate", description="Difficulty level")
     created_at: datetime = Field(default_factory=datetime.now)
@@ -326,6 +357,49 @@ class GradingResult(BaseModel):
     confidence_score: float = Field(..., ge=0, le=1, description="Confidence in the grading result")
 
 
+class CoTConceptComparison(BaseModel):
+    """Concept comparison from a Chain-of-Thought grading response"""
+    concept: str = ""
+    present: bool = False
+    accuracy_percentage: float = 0
+    evidence: Optional[str] = None
+    evaluation: Optional[str] = ""
+
+
+class CoTComparativeAnalysis(BaseModel):
+    """Comparative analysis step of a Chain-of-Thought grading response"""
+    concept_comparison: List[CoTConceptComparison] = []
+    overall_coherence: float = 0.8
+
+
+class CoTCriterionScore(BaseModel):
+    """Rubric criterion score from a Chain-of-Thought grading response"""
+    points_awarded: float = 0
+    max_points: Optional[float] = None
+    justification: Optional[str] = ""
+
+
+class CoTFinalSummary(BaseModel):
+    """Final summary step of a Chain-of-Thought grading response"""
+    total_score: float = 0
+    max_possible_score: Optional[float] = None
+    percentage: Optional[float] = None
+    passed: Optional[bool] = None
+    overall_feedback: Optional[str] = ""
+    strengths: List[str] = []
+    areas_for_improvement: List[str] = []
+    specific_suggestions: List[str] = []
+    confidence_level: float = 0.85
+
+
+class ChainOfThoughtResult(BaseModel):
+    """Chain-of-Thought grading response, validated straight from the LLM's JSON text"""
+    key_concept_extraction: List[Dict[str, Any]] = []
+    comparative_analysis: CoTComparativeAnalysis = Field(default_factory=CoTComparativeAnalysis)
+    rubric_evaluation: Dict[str, Union[CoTCriterionScore, float]] = {}
+    final_summary_and_feedback: CoTFinalSummary = Field(default_factory=CoTFinalSummary)
+
+
 class LLMProvider(str, Enum):
     """Supported LLM providers"""
     GITHUB = "github"
@@ -347,7 +421,7 @@ class GradingRequest(BaseModel):
 
 class GradingResponse(BaseModel):
     """Response model for grading request"""
-    result: GradingResult = Field(..., description="The grading result")
+    result: Optional[GradingResult] = Field(None, description="The grading result (None when grading failed)")
     processing_time_ms: float = Field(..., description="Time taken to process the request")
     success: bool = Field(..., description="Whether the grading was successful")
     error_message: Optional[str] = Field(None, description="Error message if grading failed")
@@ -8,6 +8,7 @@ from typing import List, Dict, Any, Optional
 from types import SimpleNamespace
 from sqlalchemy import text
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
 from src.utils.database_manager import DatabaseManager
@@ -21,10 +22,9 @@ def _row_to_ns(row: Any) -> SimpleNamespace:
     if row is None:
         return None  # type: ignore
     try:
-        mapping = row._mapping  # SQLAlchemy 1.4/2.0 RowMapping
-        return SimpleNamespace(**dict(mapping))
+        return SimpleNamespace(**row._mapping)  # SQLAlchemy 1.4/2.0 RowMapping
     except AttributeError:
-        return SimpleNamespace(**dict(row))
+        return SimpleNamespace(**row._asdict())
 
 
 class AnswerService:
@@ -36,12 +36,16 @@ class AnswerService:
         """Get database session"""
         return self.db_manager.get_session()
     
+    def get_async_session(self) -> AsyncSession:
+        """Get async database session"""
+        return self.db_manager.get_async_session()
+    
     
 ############################################
 
     async def get_all_ideal_answers(self) -> List[IdealAnswer]:
         """Get all ideal answers from the database"""
-        session = self.get_session()
+        session = self.get_async_session()
         try:
             sql = text("""
                     SELECT question_id, subject, ideal_answer, max_marks 
@@ -49,7 +53,7 @@ class AnswerService:
                     WHERE ideal_answer IS NOT NULL
                     ORDER BY question_id DESC
                     """)
-            rows = session.execute(sql).fetchall()
+            rows = (await session.execute(sql)).fetchall()
             
             result: List[IdealAnswer] = []
             for row in rows:
@@ -67,12 +71,12 @@ class AnswerService:
             logger.error(f"Error retrieving ideal answers: {e}")
             return []
         finally:
-            session.close()
+            await session.close()
     
     
     async def get_ideal_answer_by_question_id(self, question_id: int) -> IdealAnswer:
         """Get ideal answer for a specific question"""
-        session = self.get_session()
+        session = self.get_async_session()
         try:
             sql = text(
                 """
@@ -82,7 +86,7 @@ class AnswerService:
                     ORDER BY question_id DESC
                 """
             )
-            row = session.execute(sql, {"question_id": question_id}).fetchone()
+            row = (await session.execute(sql, {"question_id": question_id})).fetchone()
             
             if not row:
                 return None
@@ -100,25 +104,26 @@ class AnswerService:
             logger.error(f"Error retrieving ideal answer for question {question_id}: {e}")
             return None
         finally:
-            session.close()
+            await session.close()
     
     
     async def get_all_student_answers(self) -> List[StudentAnswer]:
         """Get all student answers from the database as a list of StudentAnswer models"""
-        session = self.get_session()
+        session = self.get_async_session()
         student_answers: List[StudentAnswer] = []
 
         try:
             # Fetch all student answer rows ordered by answer_id
             sql = text(
                 """
-                SELECT a.answer_id,a.student_id,a.question_id,q.subject,q.topic,q.question_text,a.answer_text,a.language,a.word_count,q.max_marks,q.passing_threshold
+                SELECT a.answer_id,a.student_id,a.question_id,q.subject,q.topic,q.question_text,a.answer_text,a.language,
+                       COALESCE(NULLIF(a.word_count, 0), a.word_count_calc) AS word_count,q.max_marks,q.passing_threshold
                 FROM Student_Answers a
                 INNER JOIN Question_Bank q ON a.question_id = q.question_id
                 ORDER BY a.answer_id DESC
                 """
             )
-            rows = session.execute(sql).fetchall()
+            rows = (await session.execute(sql)).fetchall()
 
             for row in rows:
                 sa = _row_to_ns(row)
@@ -146,36 +151,29 @@ class AnswerService:
             return []
 
         finally:
-            session.close()
+            await session.close()
     
     
     async def get_student_answer(self, student_id: int, question_id: int) -> StudentAnswer:
         """Get student's submitted answer via direct SQL"""
-        session = self.get_session()
+        session = self.get_async_session()
         try:
             sql = text(
                 """
-                SELECT a.answer_id,a.student_id,a.question_id,q.subject,q.topic,q.question_text,a.answer_text,a.language,a.word_count,q.max_marks,q.passing_threshold
+                SELECT a.answer_id,a.student_id,a.question_id,q.subject,q.topic,q.question_text,a.answer_text,a.language,
+                       COALESCE(NULLIF(a.word_count, 0), a.word_count_calc) AS word_count,q.max_marks,q.passing_threshold
                 FROM Student_Answers a
                 INNER JOIN Question_Bank q ON a.question_id = q.question_id
                 WHERE a.student_id = :student_id AND a.question_id = :question_id
                 ORDER BY a.answer_id DESC
                 """
             )
-            row = session.execute(sql, {"student_id": student_id, "question_id": question_id}).fetchone()
+            row = (await session.execute(sql, {"student_id": student_id, "question_id": question_id})).fetchone()
             
             if not row:
                 return None
             sa = row._mapping if hasattr(row, "_mapping") else row
             
-            ##### Update word count if not set
-            if not sa["word_count"]:
-                wc = len((sa["answer_text"] or "").split())
-                session.execute(text("UPDATE Student_Answers SET word_count = :wc WHERE id = :id"), {"wc": wc, "id": sa["id"]})
-                session.commit()
-                sa = dict(sa)
-                sa["word_count"] = wc
-            
             logger.info(f"Retrieved answer from student {student_id} for question {question_id}")
             
             # Return a simple namespace-like dict access via attribute in routers
@@ -185,23 +183,23 @@ class AnswerService:
             logger.error(f"Database error retrieving student answer: {e}")
             return None
         finally:
-            session.close()
+            await session.close()
     
     async def submit_student_answer(self, student_id: int, question_id: int, answer_text: str, language: str = "en") -> StudentAnswer:
         """Insert a new student answer and return the joined StudentAnswer model"""
         if not answer_text or not str(answer_text).strip():
             raise ValueError("answer_text is required")
 
-        session = self.get_session()
+        session = self.get_async_session()
         try:
             # Ensure the question exists and fetch question details for response mapping
-            q_row = session.execute(text(
+            q_row = (await session.execute(text(
                 """
                 SELECT question_id, subject, topic, question_text, max_marks, passing_threshold
                 FROM Question_Bank
                 WHERE question_id = :qid
                 """
-            ), {"qid": question_id}).fetchone()
+            ), {"qid": question_id})).fetchone()
             if not q_row:
                 raise ValueError(f"Question {question_id} not found")
 
@@ -216,26 +214,26 @@ class AnswerService:
                 VALUES (:student_id, :question_id, :answer_text, :language, :word_count, GETUTCDATE())
                 """
             )
-            inserted = session.execute(insert_sql, {
+            inserted = (await session.execute(insert_sql, {
                 "student_id": student_id,
                 "question_id": question_id,
                 "answer_text": answer_text,
                 "language": language,
                 "word_count": word_count,
-            }).fetchone()
-            session.commit()
+            })).fetchone()
+            await session.commit()
 
             new_answer_id = inserted[0] if inserted else None
 
             # Retrieve the full joined row as returned by other getters
-            row = session.execute(text(
+            row = (await session.execute(text(
                 """
                 SELECT a.answer_id,a.student_id,a.question_id,q.subject,q.topic,q.question_text,a.answer_text,a.language,a.word_count,q.max_marks,q.passing_threshold
                 FROM Student_Answers a
                 INNER JOIN Question_Bank q ON a.question_id = q.question_id
                 WHERE a.answer_id = :aid
                 """
-            ), {"aid": new_answer_id}).fetchone()
+            ), {"aid": new_answer_id})).fetchone()
 
             if not row:
                 # Fallback: construct from question + provided fields
@@ -272,26 +270,27 @@ class AnswerService:
             return result
 
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             logger.error(f"Error submitting student answer: {e}")
             raise
         finally:
-            session.close()
+            await session.close()
     
     
     async def get_student_answers_by_student(self, student_id: int) -> List[StudentAnswer]:
         """Get all answers for a specific student"""
-        session = self.get_session()
+        session = self.get_async_session()
         try:
-            rows = session.execute(text(
+            rows = (await session.execute(text(
                 """
-                SELECT sa.*, q.question_id, q.question_text
+                SELECT sa.id, sa.answer_id, sa.student_id, sa.answer_text, sa.word_count, sa.submitted_at, sa.language,
+                       q.question_id, q.question_text
                 FROM student_answers sa
                 INNER JOIN questions q ON sa.question_id = q.id
                 WHERE sa.student_id = :student_id
                 ORDER BY sa.submitted_at DESC
                 """
-            ), {"student_id": student_id}).fetchall()
+            ), {"student_id": student_id})).fetchall()
             result: List[Dict[str, Any]] = []
             for row in rows:
                 m = row._mapping if hasattr(row, "_mapping") else row
@@ -313,6 +312,6 @@ class AnswerService:
             logger.error(f"Error retrieving answers for student {student_id}: {e}")
             return []
         finally:
-            session.close()
+            await session.close()
 
 ############################################
\ No newline at end of file
@@ -3,10 +3,15 @@ Core Grading Service for AI Examiner System
 Orchestrates the entire grading process using LLM services
 """
 import uuid
+import bisect
+import hashlib
 import time
+import numpy as np
+import asyncio
 import logging
+import orjson
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from types import SimpleNamespace
 from sqlalchemy import text
@@ -16,10 +21,17 @@ from ..utils.database_manager import DatabaseManager
 
 from ..models.schemas import (
     IdealAnswer, StudentAnswer, GradingResult, ConceptEvaluation,
-    KeyConcept, GradingResponse, BatchGradingRequest, BatchGradingResponse
+    KeyConcept, GradingRequest, GradingResponse, BatchGradingRequest, BatchGradingResponse,
+    ChainOfThoughtResult, CoTCriterionScore
 )
-from .llm_service import llm_service
+from .llm_service import llm_circuit_breaker, llm_service
+from .write_behind import WriteBehindWriter
 from ..utils.config import settings
+from ..utils.concurrency import estimate_tokens, grading_semaphore
+from ..utils.metrics import grade_duration, llm_calls, llm_stage_duration
+from ..utils.cache import (
+    answer_cache_key, exact_grade_cache, key_concept_cache, normalize_text, semantic_grade_cache
+)
 
 
 logger = logging.getLogger(__name__)
@@ -29,10 +41,35 @@ def _row_to_ns(row: Any) -> SimpleNamespace:
     if row is None:
         return None  # type: ignore
     try:
-        mapping = row._mapping  # SQLAlchemy 1.4/2.0 RowMapping
-        return SimpleNamespace(**dict(mapping))
+        return SimpleNamespace(**row._mapping)  # SQLAlchemy 1.4/2.0 RowMapping
     except AttributeError:
-        return SimpleNamespace(**dict(row))
+        return SimpleNamespace(**row._asdict())
+
+def _rubric_data(ideal_answer: IdealAnswer) -> Dict[str, Any]:
+    """Convert rubric to dict format (skipped when a pre-serialized rubric is available)"""
+    if ideal_answer.rubric_json:
+        return {"passing_threshold": ideal_answer.rubric.passing_threshold}
+    return ideal_answer.rubric.rubric_dict
+
+def _too_short_to_grade(answer_text: str) -> bool:
+    """Blank answers, or answers under the opt-in settings.min_answer_chars cutoff"""
+    stripped = answer_text.strip()
+    return not stripped or len(stripped) < settings.min_answer_chars
+
+def _ideal_answer_key(ideal_answer: IdealAnswer) -> str:
+    """SHA-256 of everything grading depends on: ideal answer text, rubric, subject and topic
+    
+    Cache and pack keys use this rather than IdealAnswer.id, which the client
+    supplies and may reuse across edited or unrelated ideal answers.
+    """
+    rubric = ideal_answer.rubric_json or ideal_answer.rubric.model_dump_json()
+    payload = orjson.dumps([ideal_answer.content, rubric, ideal_answer.subject, ideal_answer.rubric.topic])
+    return hashlib.sha256(payload).hexdigest()
+
+# Estimated answer tokens separating the short / medium / long dispatch bins
+# (StudentAnswer.content is capped at 2000 characters, ~500 tokens)
+_LENGTH_BIN_EDGES = (64, 256)
+_LENGTH_BIN_NAMES = ("short", "medium", "long")
 
 @dataclass
 class GradingMetrics:
@@ -62,7 +99,7 @@ class SemanticAnalyzer:
     async def extract_key_concepts(self, ideal_answer: IdealAnswer) -> List[KeyConcept]:
         """Extract key concepts from an ideal answer"""
         try:
-            start_time = time.time()
+            start_ns = time.perf_counter_ns()
             
             concepts_data = await self.llm_service.extract_key_concepts(
                 ideal_answer.content,
@@ -70,8 +107,7 @@ class SemanticAnalyzer:
                 ideal_answer.rubric.topic
             )
             
-            processing_time = (time.time() - start_time) * 1000
-            logger.info(f"Key concept extraction completed in {processing_time:.2f}ms")
+            llm_stage_duration.record((time.perf_counter_ns() - start_ns) / 1_000_000, {"stage": "extract_concepts"})
             
             # Convert to KeyConcept objects
             key_concepts = []
@@ -87,7 +123,7 @@ class SemanticAnalyzer:
             return key_concepts
             
         except Exception as e:
-            logger.error(f"Failed to extract key concepts: {e}")
+            logger.error("Failed to extract key concepts: %s", e)
             raise GradingError(f"Key concept extraction failed: {e}")
     
     async def analyze_semantic_similarity(
@@ -98,18 +134,15 @@ class SemanticAnalyzer:
     ) -> Dict[str, Any]:
         """Analyze semantic similarity between answers"""
         try:
-            start_time = time.time()
+            start_ns = time.perf_counter_ns()
+            
+            local_result = self.local_semantic_analysis(ideal_answer, student_answer, key_concepts)
+            if local_result is not None:
+                llm_stage_duration.record((time.perf_counter_ns() - start_ns) / 1_000_000, {"stage": "semantic_analysis_local"})
+                return local_result
             
             # Convert key concepts to dict format for LLM
-            concepts_data = [
-                {
-                    "concept": kc.concept,
-                    "importance": kc.importance,
-                    "keywords": kc.keywords,
-                    "explanation": kc.explanation
-                }
-                for kc in key_concepts
-            ]
+            concepts_data = [kc.prompt_dict for kc in key_concepts]
             
             analysis_result = await self.llm_service.analyze_semantic_similarity(
                 ideal_answer.content,
@@ -117,14 +150,49 @@ class SemanticAnalyzer:
                 concepts_data
             )
             
-            processing_time = (time.time() - start_time) * 1000
-            logger.info(f"Semantic analysis completed in {processing_time:.2f}ms")
+            llm_stage_duration.record((time.perf_counter_ns() - start_ns) / 1_000_000, {"stage": "semantic_analysis"})
             
             return analysis_result
             
         except Exception as e:
-            logger.error(f"Semantic similarity analysis failed: {e}")
+            logger.error("Semantic similarity analysis failed: %s", e)
             raise GradingError(f"Semantic analysis failed: {e}")
+    
+    def local_semantic_analysis(
+        self,
+        ideal_answer: IdealAnswer,
+        student_answer: StudentAnswer,
+        key_concepts: List[KeyConcept]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Semantic analysis without the LLM for answers identical to the ideal answer
+        
+        Returns None unless the answer equals the ideal answer after collapsing
+        whitespace; anything else, including close paraphrases or a change of case,
+        goes to the LLM.
+        """
+        if not student_answer.content or normalize_text(student_answer.content) != normalize_text(ideal_answer.content):
+            return None
+        
+        concept_evaluations = [
+            {
+                "concept": kc.concept,
+                "present": True,
+                "accuracy_score": 1.0,
+                "explanation": "The answer matches the ideal answer.",
+                "evidence": None
+            }
+            for kc in key_concepts
+        ]
+        
+        logger.info("Local semantic analysis for student %s (answer matches the ideal answer)", student_answer.student_id)
+        return {
+            "concept_evaluations": concept_evaluations,
+            "completeness_score": 1.0,
+            "overall_semantic_similarity": 1.0,
+            "coherence_score": 1.0,
+            "source": "local"
+        }
 
 
 class ResponseEvaluator:
@@ -141,92 +209,104 @@ class ResponseEvaluator:
     ) -> Dict[str, Any]:
         """Apply grading rubric to generate scores and feedback"""
         try:
-            start_time = time.time()
-            
-            # Convert rubric to dict format
-            rubric_data = {
-                "subject": ideal_answer.rubric.subject,
-                "topic": ideal_answer.rubric.topic,
-                "criteria": [
-                    {
-                        "name": criterion.name,
-                        "description": criterion.description,
-                        "max_points": criterion.max_points,
-                        "weight": criterion.weight
-                    }
-                    for criterion in ideal_answer.rubric.criteria
-                ],
-                "total_max_points": ideal_answer.rubric.total_max_points,
-                "passing_threshold": ideal_answer.rubric.passing_threshold
-            }
+            start_ns = time.perf_counter_ns()
+            
+            rubric_data = _rubric_data(ideal_answer)
             
             rubric_result = await self.llm_service.apply_grading_rubric(
                 ideal_answer.content,
                 student_answer.content,
                 rubric_data,
                 semantic_analysis.get("concept_evaluations", []),
-                semantic_analysis
+                semantic_analysis,
+                rubric_json=ideal_answer.rubric_json
             )
             
-            processing_time = (time.time() - start_time) * 1000
-            logger.info(f"Rubric application completed in {processing_time:.2f}ms")
+            llm_stage_duration.record((time.perf_counter_ns() - start_ns) / 1_000_000, {"stage": "rubric"})
             
             return rubric_result
             
         except Exception as e:
-            logger.error(f"Rubric application failed: {e}")
+            logger.error("Rubric application failed: %s", e)
             raise GradingError(f"Rubric application failed: {e}")
     
+    async def fused_grading(
+        self,
+        ideal_answer: IdealAnswer,
+        student_answer: StudentAnswer,
+        key_concepts: Optional[List[KeyConcept]] = None
+    ) -> Dict[str, Any]:
+        """Extract key concepts (unless given), analyze similarity and apply the rubric in a single LLM call"""
+        try:
+            start_ns = time.perf_counter_ns()
+            
+            rubric_data = _rubric_data(ideal_answer)
+            
+            fused_result = await self.llm_service.grade_fused(
+                ideal_answer.content,
+                student_answer.content,
+                ideal_answer.subject,
+                ideal_answer.rubric.topic,
+                rubric_data,
+                rubric_json=ideal_answer.rubric_json,
+                key_concepts=[kc.prompt_dict for kc in key_concepts] if key_concepts else None
+            )
+            
+            llm_stage_duration.record((time.perf_counter_ns() - start_ns) / 1_000_000, {"stage": "fused"})
+            
+            return fused_result
+            
+        except Exception as e:
+            logger.error("Fused grading failed: %s", e)
+            raise GradingError(f"Fused grading failed: {e}")
+    
     async def chain_of_thought_grading(
         self,
         ideal_answer: IdealAnswer,
         student_answer: StudentAnswer
-    ) -> Dict[str, Any]:
+    ) -> ChainOfThoughtResult:
         """Perform comprehensive Chain-of-Thought grading"""
         try:
-            start_time = time.time()
-            
-            # Convert rubric to dict format
-            rubric_data = {
-                "subject": ideal_answer.rubric.subject,
-                "topic": ideal_answer.rubric.topic,
-                "criteria": [
-                    {
-                        "name": criterion.name,
-                        "description": criterion.description,
-                        "max_points": criterion.max_points,
-                        "weight": criterion.weight
-                    }
-                    for criterion in ideal_answer.rubric.criteria
-                ],
-                "total_max_points": ideal_answer.rubric.total_max_points,
-                "passing_threshold": ideal_answer.rubric.passing_threshold
-            }
+            start_ns = time.perf_counter_ns()
+            
+            rubric_data = _rubric_data(ideal_answer)
             
             cot_result = await self.llm_service.chain_of_thought_grading(
                 ideal_answer.content,
                 student_answer.content,
                 ideal_answer.subject,
-                rubric_data
+                rubric_data,
+                rubric_json=ideal_answer.rubric_json
             )
             
-            processing_time = (time.time() - start_time) * 1000
-            logger.info(f"Chain-of-thought grading completed in {processing_time:.2f}ms")
+            llm_stage_duration.record((time.perf_counter_ns() - start_ns) / 1_000_000, {"stage": "chain_of_thought"})
             
             return cot_result
             
         except Exception as e:
-            logger.error(f"Chain-of-thought grading failed: {e}")
+            logger.error("Chain-of-thought grading failed: %s", e)
             raise GradingError(f"Chain-of-thought grading failed: {e}")
 
 
+# Shared by every GradeService; they hold no per-request state
+_response_evaluator = ResponseEvaluator()
+_semantic_analyzer = SemanticAnalyzer()
+
+
 class GradeService:
     
     def __init__(self, db_manager: DatabaseManager = None):
-        self.semantic_analyzer = SemanticAnalyzer()
-        self.response_evaluator = ResponseEvaluator()
+        self.semantic_analyzer = _semantic_analyzer
+        self.response_evaluator = _response_evaluator
         self.llm_service = llm_service
         self.db_manager = db_manager
+        self.result_writer = None
+        if db_manager is not None and settings.grading_write_behind:
+            self.result_writer = WriteBehindWriter(
+                db_manager,
+                batch_size=settings.write_behind_batch_size,
+                flush_interval=settings.write_behind_flush_ms / 1000
+            )
     
     def get_session(self) -> Session:
         """Get database session"""
@@ -254,36 +334,100 @@ class GradeService:
         """
         from .rag_service import RAGService
         
-        logger.info(f"Starting complete grading workflow for student {student_id}, question {question_id}")
+        logger.info("Starting complete grading workflow for student %s, question %s", student_id, question_id)
         
         # Initialize RAG service
-        rag_service = RAGService(self.db_manager)
-        
-        # Step 1: Retrieve ideal answer and marks
-        question = await rag_service.get_question_with_ideal_answer(question_id)
-        if not question:
-            raise ValueError(f"Question {question_id} not found")
-        logger.info(f"grade_service -> get_question_with_ideal_answer: {question}")
+        rag_service = RAGService(self.db_manager, self.result_writer)
         
-        
-        # Step 2: Extract and save key concepts (semantic understanding)
-        key_concepts = await rag_service.extract_and_save_key_concepts(question)
-        if not key_concepts:
-            raise ValueError(f"Failed to extract key concepts for question {question_id}")
-        logger.info(f"grade_service -> extract_and_save_key_concepts: {key_concepts}")
-        
-        # Step 3: Retrieve student's submitted answer
-        student_answer = await rag_service.get_student_answer(student_id, question_id)
+        # Step 3 only needs the ids, so the student's answer is read while steps 1-2 run
+        answer_task = asyncio.create_task(rag_service.get_student_answer(student_id, question_id))
+        try:
+            # Step 1: Retrieve ideal answer and marks
+            question = await rag_service.get_question_with_ideal_answer(question_id)
+            if not question:
+                raise ValueError(f"Question {question_id} not found")
+            logger.debug("grade_service -> get_question_with_ideal_answer: %s", question)
+            
+            # Step 2: Extract and save key concepts (semantic understanding)
+            key_concepts, student_answer = await asyncio.gather(
+                rag_service.extract_and_save_key_concepts(question),
+                answer_task
+            )
+        finally:
+            answer_task.cancel()
         if not student_answer:
             raise ValueError(f"Student answer not found for student {student_id}, question {question_id}")
-        logger.info(f"grade_service -> get_student_answer: {student_answer}")
+        logger.debug("grade_service -> get_student_answer: %s", student_answer)
+        if not key_concepts:
+            raise ValueError(f"Failed to extract key concepts for question {question_id}")
+        logger.debug("grade_service -> extract_and_save_key_concepts: %s", key_concepts)
         
         # Step 4: Grade and save results
         result = await rag_service.grade_and_save_result(question, student_answer, key_concepts)
         
-        logger.info(f"Completed grading workflow for student {student_id}: {result['Score']}")
+        logger.info("Completed grading workflow for student %s: %s", student_id, result['Score'])
         return result
     
+    async def complete_grading_workflow_batch(
+        self,
+        question_id: int,
+        student_ids: List[int],
+        on_result: Optional[Callable[[int], None]] = None
+    ) -> List[Any]:
+        """
+        Batched variant of complete_grading_workflow for several students answering
+        the same question: steps 1-2 run once and semantic analysis is packed into
+        shared LLM calls.
+        
+        Args:
+            question_id: Question identifier
+            student_ids: Student identifiers
+            on_result: Optional callback receiving a student's index in student_ids
+                once that student's answer is graded (or has failed)
+            
+        Returns:
+            One grading result (or the exception raised for it) per student, in order
+        """
+        from .rag_service import RAGService
+        
+        logger.info("Starting batch grading workflow for %s students, question %s", len(student_ids), question_id)
+        
+        rag_service = RAGService(self.db_manager, self.result_writer)
+        
+        # Steps 1-3 share one session: a single connection checkout for the whole
+        # batch, and every student's answer comes back in one query
+        async with rag_service.get_async_session() as session:
+            question = await rag_service.get_question_with_ideal_answer(question_id, session)
+            if not question:
+                raise ValueError(f"Question {question_id} not found")
+            
+            answers_by_student = await rag_service.get_student_answers_bulk(question_id, student_ids, session)
+            student_answers = [answers_by_student.get(student_id) for student_id in student_ids]
+            
+            # Step 2 is shared by every student in the batch
+            key_concepts = await rag_service.extract_and_save_key_concepts(question, session)
+            if not key_concepts:
+                raise ValueError(f"Failed to extract key concepts for question {question_id}")
+        
+        results: List[Any] = [
+            ValueError(f"Student answer not found for student {student_id}, question {question_id}")
+            for student_id in student_ids
+        ]
+        found = [i for i, answer in enumerate(student_answers) if answer]
+        
+        # Step 4: Grade and save results
+        graded = await rag_service.grade_batch(
+            question,
+            [student_answers[i] for i in found],
+            key_concepts,
+            on_result=(lambda j: on_result(found[j])) if on_result else None
+        )
+        for i, result in zip(found, graded):
+            results[i] = result
+        
+        logger.info("Completed batch grading workflow for question %s", question_id)
+        return results
+    
 ##################################################
     
     
@@ -306,11 +450,26 @@ class GradeService:
         Returns:
             Complete grading result with scores and feedback
         """
-        start_time = time.time()
+        # Blank (or, when configured, too short) answers score zero without an LLM call
+        if _too_short_to_grade(student_answer.content):
+            logger.info("Answer from student %s is blank or too short to evaluate", student_answer.student_id)
+            return self._empty_answer_result(student_answer, ideal_answer)
+        
+        start_ns = time.perf_counter_ns()
         metrics = GradingMetrics(0, 0, 0, 0, 0, 0.0)
         
+        # Results are reusable for the same ideal answer, rubric, subject and topic
+        cache_scope = ("grade_answer", _ideal_answer_key(ideal_answer), use_chain_of_thought)
+        cached = self._cached_grading_result(cache_scope, student_answer)
+        if cached is not None:
+            return cached
+        
+        # Fail fast without spending rate-limit budget while the LLM provider is down
+        if llm_circuit_breaker.is_open:
+            raise GradingError("Failed to grade answer: LLM circuit breaker is open")
+        
         try:
-            logger.info(f"Starting grading process for student {student_answer.student_id}")
+            logger.info("Starting grading process for student %s", student_answer.student_id)
             
             if use_chain_of_thought:
                 # Use comprehensive Chain-of-Thought grading (recommended approach)
@@ -324,17 +483,99 @@ class GradeService:
                 )
             
             # Calculate total processing time
-            total_time = (time.time() - start_time) * 1000
+            total_time = (time.perf_counter_ns() - start_ns) / 1_000_000
             metrics.processing_time_ms = total_time
             
-            logger.info(f"Grading completed in {total_time:.2f}ms with {metrics.total_llm_calls} LLM calls")
+            grade_duration.record(total_time)
+            llm_calls.add(metrics.total_llm_calls)
+            
+            self._store_grading_result(cache_scope, student_answer, result)
             
             return result
             
         except Exception as e:
-            logger.error(f"Grading failed: {e}")
+            logger.error("Grading failed: %s", e)
             raise GradingError(f"Failed to grade answer: {e}")
     
+    def _cached_grading_result(self, cache_scope: Any, student_answer: StudentAnswer) -> Any:
+        """Return a cached result for an identical or near-identical answer, re-issued for this student"""
+        cached = None
+        if settings.exact_cache_enabled:
+            cached = exact_grade_cache.get(answer_cache_key(cache_scope, student_answer.content))
+        if cached is None and settings.semantic_cache_enabled:
+            cached = semantic_grade_cache.lookup(cache_scope, student_answer.content)
+        if cached is None:
+            return None
+        
+        logger.info("Grading cache hit for student %s, question %s", student_answer.student_id, student_answer.question_id)
+        return cached.model_copy(update={
+            "id": str(uuid.uuid4()),
+            "student_answer_id": student_answer.id or str(uuid.uuid4()),
+            "graded_at": datetime.now()
+        })
+    
+    def _store_grading_result(self, cache_scope: Any, student_answer: StudentAnswer, result: GradingResult) -> None:
+        """Cache a fresh result for reuse by identical or near-identical answers"""
+        if settings.exact_cache_enabled:
+            exact_grade_cache.set(answer_cache_key(cache_scope, student_answer.content), result)
+        if settings.semantic_cache_enabled:
+            semantic_grade_cache.store(cache_scope, student_answer.content, result)
+    
+    async def _grade_pack(self, grading_requests: List[GradingRequest]) -> List[Optional[GradingResult]]:
+        """
+        Chain-of-Thought grade several answers to the same ideal answer in one LLM call
+        
+        Blank and cached answers are resolved without the LLM. Returns one result per
+        request, in order; None where the request still needs a single-answer grade,
+        including any request whose ideal answer or rubric differs from the first.
+        """
+        ideal_answer = grading_requests[0].ideal_answer
+        ideal_key = _ideal_answer_key(ideal_answer)
+        cache_scope = ("grade_answer", ideal_key, True)
+        results: List[Optional[GradingResult]] = [None] * len(grading_requests)
+        pending = []
+        for i, grading_request in enumerate(grading_requests):
+            student_answer = grading_request.student_answer
+            if i and _ideal_answer_key(grading_request.ideal_answer) != ideal_key:
+                continue
+            if _too_short_to_grade(student_answer.content):
+                results[i] = self._empty_answer_result(student_answer, grading_request.ideal_answer)
+            else:
+                results[i] = self._cached_grading_result(cache_scope, student_answer)
+            if results[i] is None:
+                pending.append(i)
+        
+        # A lone answer gains nothing from packing; leave the circuit breaker to grade_answer
+        if len(pending) < 2 or llm_circuit_breaker.is_open:
+            return results
+        
+        start_ns = time.perf_counter_ns()
+        cot_results = await self.llm_service.chain_of_thought_grading_multi(
+            ideal_answer=ideal_answer.content,
+            student_answers=[grading_requests[i].student_answer.content for i in pending],
+            subject=ideal_answer.subject,
+            rubric=_rubric_data(ideal_answer),
+            rubric_json=ideal_answer.rubric_json
+        )
+        llm_calls.add(1)
+        
+        graded = 0
+        for i, cot_result in zip(pending, cot_results):
+            if cot_result is None:
+                continue
+            grading_request = grading_requests[i]
+            result = await asyncio.to_thread(
+                self._result_from_chain_of_thought,
+                cot_result, grading_request.student_answer, grading_request.ideal_answer
+            )
+            self._store_grading_result(cache_scope, grading_request.student_answer, result)
+            results[i] = result
+            graded += 1
+        
+        elapsed = (time.perf_counter_ns() - start_ns) / 1_000_000
+        logger.info("Graded %d of %d packed answers in one call (%.2fms)", graded, len(pending), elapsed)
+        return results
+    
     async def _grade_with_chain_of_thought(
         self,
         student_answer: StudentAnswer,
@@ -344,41 +585,89 @@ class GradeService:
         """Grade using Chain-of-Thought approach (recommended)"""
         
         # Perform comprehensive Chain-of-Thought grading
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         cot_result = await self.response_evaluator.chain_of_thought_grading(
             ideal_answer, student_answer
         )
         metrics.total_llm_calls += 1
-        cot_time = (time.time() - start_time) * 1000
+        cot_time = (time.perf_counter_ns() - start_ns) / 1_000_000
+        
+        # Result assembly is pure CPU, so keep it off the event loop
+        return await asyncio.to_thread(
+            self._result_from_chain_of_thought, cot_result, student_answer, ideal_answer
+        )
+    
+    def _empty_answer_result(
+        self,
+        student_answer: StudentAnswer,
+        ideal_answer: IdealAnswer
+    ) -> GradingResult:
+        """Build a zero-score GradingResult for a blank or trivially short answer"""
+        return GradingResult(
+            id=str(uuid.uuid4()),
+            student_answer_id=student_answer.id or str(uuid.uuid4()),
+            ideal_answer_id=ideal_answer.id or str(uuid.uuid4()),
+            total_score=0.0,
+            max_possible_score=ideal_answer.rubric.total_max_points,
+            percentage=0.0,
+            passed=False,
+            concept_evaluations=[
+                ConceptEvaluation(
+                    concept=kc.concept,
+                    present=False,
+                    accuracy_score=0.0,
+                    explanation="Answer is blank or too short to evaluate"
+                )
+                for kc in ideal_answer.key_concepts
+            ],
+            criteria_scores={criterion.name: 0.0 for criterion in ideal_answer.rubric.criteria},
+            semantic_similarity=0.0,
+            coherence_score=0.0,
+            completeness_score=0.0,
+            weaknesses=["Answer is blank or too short to evaluate"],
+            suggestions=["Write a complete answer that addresses the key concepts of the question"],
+            detailed_feedback="The submitted answer is blank or too short to evaluate and was awarded no points.",
+            graded_at=datetime.now(),
+            grading_model=settings.llm_model,
+            confidence_score=1.0
+        )
+    
+    def _result_from_chain_of_thought(
+        self,
+        cot_result: ChainOfThoughtResult,
+        student_answer: StudentAnswer,
+        ideal_answer: IdealAnswer
+    ) -> GradingResult:
+        """Build a GradingResult from a Chain-of-Thought response"""
         
         # Extract results from Chain-of-Thought response
-        final_result = cot_result.get("step5_final_result", {})
-        concept_comparisons = cot_result.get("step3_concept_comparison", [])
-        rubric_scores = cot_result.get("step4_rubric_scores", {})
+        final_result = cot_result.final_summary_and_feedback
+        concept_comparisons = cot_result.comparative_analysis.concept_comparison
+        rubric_scores = cot_result.rubric_evaluation
         
         # Convert concept comparisons to ConceptEvaluation objects
         concept_evaluations = []
         for comp in concept_comparisons:
             concept_eval = ConceptEvaluation(
-                concept=comp.get("concept", ""),
-                present=comp.get("present", False),
-                accuracy_score=comp.get("accuracy_percentage", 0) / 100.0,  # Convert percentage to 0-1 scale
-                explanation=comp.get("evaluation", ""),
-                evidence=comp.get("evidence", None)
+                concept=comp.concept,
+                present=comp.present,
+                accuracy_score=comp.accuracy_percentage / 100.0,  # Convert percentage to 0-1 scale
+                explanation=comp.evaluation or "",
+                evidence=comp.evidence
             )
             concept_evaluations.append(concept_eval)
         
         # Extract criteria scores
         criteria_scores = {}
         for criterion_name, criterion_data in rubric_scores.items():
-            if isinstance(criterion_data, dict):
-                criteria_scores[criterion_name] = criterion_data.get("points_awarded", 0)
+            if isinstance(criterion_data, CoTCriterionScore):
+                criteria_scores[criterion_name] = criterion_data.points_awarded
             else:
                 criteria_scores[criterion_name] = criterion_data
         
         # Calculate percentage and pass status
-        total_score = final_result.get("total_score", 0)
-        max_possible = final_result.get("max_possible", ideal_answer.rubric.total_max_points)
+        total_score = final_result.total_score
+        max_possible = final_result.max_possible_score or ideal_answer.rubric.total_max_points
         percentage = (total_score / max_possible * 100) if max_possible > 0 else 0
         passed = percentage >= ideal_answer.rubric.passing_threshold
         
@@ -398,19 +687,19 @@ class GradeService:
             
             # AI Analysis scores (estimated from CoT result)
             semantic_similarity=self._extract_similarity_score(cot_result),
-            coherence_score=cot_result.get("step2_student_analysis", {}).get("overall_coherence", 0.8),
+            coherence_score=cot_result.comparative_analysis.overall_coherence,
             completeness_score=self._calculate_completeness_score(concept_evaluations),
             
             # Feedback
-            strengths=final_result.get("strengths", []),
-            weaknesses=final_result.get("areas_for_improvement", []),
-            suggestions=final_result.get("specific_suggestions", []),
-            detailed_feedback=final_result.get("overall_feedback", ""),
+            strengths=final_result.strengths,
+            weaknesses=final_result.areas_for_improvement,
+            suggestions=final_result.specific_suggestions,
+            detailed_feedback=final_result.overall_feedback or "",
             
             # Metadata
             graded_at=datetime.now(),
             grading_model=settings.llm_model,
-            confidence_score=final_result.get("confidence_level", 0.85)
+            confidence_score=final_result.confidence_level
         )
         
         return grading_result
@@ -423,31 +712,77 @@ class GradeService:
     ) -> GradingResult:
         """Grade using step-by-step approach (alternative)"""
         
-        # Step 1: Extract key concepts if not already present
         key_concepts = ideal_answer.key_concepts
+        concepts_key = None
         if not key_concepts:
-            start_time = time.time()
-            key_concepts = await self.semantic_analyzer.extract_key_concepts(ideal_answer)
-            metrics.concept_extraction_time_ms = (time.time() - start_time) * 1000
-            metrics.total_llm_calls += 1
-        
-        # Step 2: Analyze semantic similarity
-        start_time = time.time()
-        semantic_analysis = await self.semantic_analyzer.analyze_semantic_similarity(
-            ideal_answer, student_answer, key_concepts
+            # Concepts extracted by an earlier fused grading of the same ideal answer
+            concepts_key = _ideal_answer_key(ideal_answer)
+            key_concepts = key_concept_cache.get(concepts_key) or []
+        start_ns = time.perf_counter_ns()
+        semantic_analysis = (
+            self.semantic_analyzer.local_semantic_analysis(ideal_answer, student_answer, key_concepts)
+            if key_concepts else None
         )
-        metrics.semantic_analysis_time_ms = (time.time() - start_time) * 1000
-        metrics.total_llm_calls += 1
+        if semantic_analysis is None:
+            # Steps 1-3 fused: extract (or reuse) key concepts, analyze and grade
+            # in one LLM call instead of up to three dependent round-trips
+            fused_result = await self.response_evaluator.fused_grading(ideal_answer, student_answer, key_concepts)
+            elapsed = (time.perf_counter_ns() - start_ns) / 1_000_000
+            semantic_analysis = fused_result["semantic_analysis"]
+            rubric_result = fused_result["rubric_result"]
+            if not key_concepts and fused_result.get("key_concepts"):
+                self._remember_key_concepts(concepts_key, fused_result["key_concepts"])
+            # Attribute the single call's time evenly across the steps it replaced
+            if key_concepts:
+                metrics.semantic_analysis_time_ms = elapsed / 2
+                metrics.rubric_application_time_ms = elapsed / 2
+            else:
+                metrics.concept_extraction_time_ms = elapsed / 3
+                metrics.semantic_analysis_time_ms = elapsed / 3
+                metrics.rubric_application_time_ms = elapsed / 3
+            metrics.total_llm_calls += 1
+        else:
+            # Step 2: answer closely follows the ideal answer, analyzed locally
+            metrics.semantic_analysis_time_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+            
+            # Step 3: Apply grading rubric
+            start_ns = time.perf_counter_ns()
+            rubric_result = await self.response_evaluator.apply_rubric(
+                ideal_answer, student_answer, semantic_analysis
+            )
+            metrics.rubric_application_time_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+            metrics.total_llm_calls += 1
         
-        # Step 3: Apply grading rubric
-        start_time = time.time()
-        rubric_result = await self.response_evaluator.apply_rubric(
-            ideal_answer, student_answer, semantic_analysis
+        # Step 4: Construct final result (pure CPU, kept off the event loop)
+        return await asyncio.to_thread(
+            self._result_from_step_by_step, semantic_analysis, rubric_result, student_answer, ideal_answer
         )
-        metrics.rubric_application_time_ms = (time.time() - start_time) * 1000
-        metrics.total_llm_calls += 1
-        
-        # Step 4: Construct final result
+    
+    def _remember_key_concepts(self, concepts_key: str, concepts_data: List[Dict[str, Any]]) -> None:
+        """Cache concepts extracted by a fused grading so later gradings of the ideal answer skip extraction"""
+        try:
+            key_concepts = [
+                KeyConcept(
+                    concept=concept_data["concept"],
+                    importance=concept_data["importance"],
+                    keywords=concept_data.get("keywords", []),
+                    explanation=concept_data["explanation"]
+                )
+                for concept_data in concepts_data
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Not caching malformed key concepts from fused grading: %s", e)
+            return
+        key_concept_cache.set(concepts_key, key_concepts)
+    
+    def _result_from_step_by_step(
+        self,
+        semantic_analysis: Dict[str, Any],
+        rubric_result: Dict[str, Any],
+        student_answer: StudentAnswer,
+        ideal_answer: IdealAnswer
+    ) -> GradingResult:
+        """Build a GradingResult from the semantic analysis and rubric responses"""
         concept_evaluations = []
         for eval_data in semantic_analysis.get("concept_evaluations", []):
             concept_eval = ConceptEvaluation(
@@ -498,81 +833,232 @@ class GradeService:
         
         return grading_result
     
-    async def _extract_similarity_score(self, cot_result: Dict[str, Any]) -> float:
+    def _extract_similarity_score(self, cot_result: ChainOfThoughtResult) -> float:
         """Extract semantic similarity score from Chain-of-Thought result"""
-        concept_comparisons = cot_result.get("step3_concept_comparison", [])
-        if not concept_comparisons:
-            return 0.8  # Default estimate
-        
-        # Calculate weighted average based on concept accuracy
-        total_weight = 0
-        weighted_sum = 0
-        
-        for comp in concept_comparisons:
-            accuracy = comp.get("accuracy_percentage", 0) / 100.0
-            # Assume all concepts have equal weight for simplicity
-            weight = 1.0
-            weighted_sum += accuracy * weight
-            total_weight += weight
+        concept_comparisons = cot_result.comparative_analysis.concept_comparison
         
-        return weighted_sum / total_weight if total_weight > 0 else 0.8
+        # All concepts have equal weight, so the weighted average is a plain mean
+        accuracy = np.fromiter(
+            (comp.accuracy_percentage for comp in concept_comparisons),
+            dtype=np.float64,
+            count=len(concept_comparisons)
+        )
+        if accuracy.size == 0:
+            return 0.8  # Default estimate
+        return float(accuracy.mean()) / 100.0
     
-    async def _calculate_completeness_score(self, concept_evaluations: List[ConceptEvaluation]) -> float:
+    def _calculate_completeness_score(self, concept_evaluations: List[ConceptEvaluation]) -> float:
         """Calculate completeness score based on concept coverage"""
-        if not concept_evaluations:
+        present = np.fromiter(
+            (ce.present for ce in concept_evaluations),
+            dtype=np.bool_,
+            count=len(concept_evaluations)
+        )
+        if present.size == 0:
             return 0.7  # Default estimate
+        return float(present.mean())
+    
+    async def batch_grade_stream(
+        self,
+        request: BatchGradingRequest,
+        on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> AsyncIterator[Tuple[int, GradingResponse]]:
+        """
+        Grade multiple answers concurrently (up to settings.grade_max_concurrency),
+        yielding (request index, response) as each grade finishes
         
-        present_count = sum(1 for ce in concept_evaluations if ce.present)
-        return present_count / len(concept_evaluations)
+        Args:
+            request: Batch of grading requests
+            on_progress: Optional callback receiving (completed, total) after each grade
+        """
+        async def grade_one(index: int, grading_request) -> Tuple[int, GradingResponse]:
+            async with grading_semaphore:
+                try:
+                    request_start_ns = time.perf_counter_ns()
+                    
+                    result = await self.grade_answer(
+                        grading_request.student_answer,
+                        grading_request.ideal_answer
+                    )
+                    
+                    processing_time = (time.perf_counter_ns() - request_start_ns) / 1_000_000
+                    
+                    return index, GradingResponse(
+                        result=result,
+                        processing_time_ms=processing_time,
+                        success=True,
+                        error_message=None
+                    )
+                    
+                except Exception as e:
+                    logger.error("Failed to grade individual request: %s", e)
+                    
+                    # Create error response
+                    return index, GradingResponse(
+                        result=None,
+                        processing_time_ms=0,
+                        success=False,
+                        error_message=str(e)
+                    )
+        
+        async def grade_pack(indices: List[int]) -> List[Tuple[int, GradingResponse]]:
+            async with grading_semaphore:
+                pack_start_ns = time.perf_counter_ns()
+                try:
+                    results = await self._grade_pack([request.requests[i] for i in indices])
+                except Exception as e:
+                    logger.error("Failed to grade answer pack, grading individually: %s", e)
+                    results = [None] * len(indices)
+                processing_time = (time.perf_counter_ns() - pack_start_ns) / 1_000_000
+            
+            responses = []
+            for index, result in zip(indices, results):
+                if result is None:
+                    responses.append(await grade_one(index, request.requests[index]))
+                else:
+                    responses.append((index, GradingResponse(
+                        result=result,
+                        processing_time_ms=processing_time,
+                        success=True,
+                        error_message=None
+                    )))
+            return responses
+        
+        async def grade_unit(indices: List[int], length_bin: int) -> List[Tuple[int, GradingResponse]]:
+            unit_start_ns = time.perf_counter_ns()
+            if len(indices) > 1:
+                responses = await grade_pack(indices)
+            else:
+                responses = [await grade_one(indices[0], request.requests[indices[0]])]
+            logger.debug(
+                "Length bin %s graded %d answers in %.2fms",
+                _LENGTH_BIN_NAMES[length_bin], len(indices), (time.perf_counter_ns() - unit_start_ns) / 1_000_000
+            )
+            return responses
+        
+        # Expected output length grows with the answer, so similar lengths are packed and
+        # dispatched together: short answers never wait behind long ones in a pack, and
+        # the semaphore admits the short bin first
+        tokens = [
+            estimate_tokens(grading_request.student_answer.content)
+            for grading_request in request.requests
+        ]
+        
+        # Answers to the same ideal answer and rubric (by content, not client id) are
+        # packed into one Chain-of-Thought call
+        pack_size = settings.multi_answer_pack_size
+        groups: Dict[Any, List[int]] = {}
+        units: List[List[int]] = []
+        for i, grading_request in enumerate(request.requests):
+            if pack_size > 1:
+                groups.setdefault(_ideal_answer_key(grading_request.ideal_answer), []).append(i)
+            else:
+                units.append([i])
+        for indices in groups.values():
+            indices.sort(key=tokens.__getitem__)
+            units.extend(indices[start:start + pack_size] for start in range(0, len(indices), pack_size))
+        
+        binned_units = sorted(
+            ((bisect.bisect_right(_LENGTH_BIN_EDGES, max(tokens[i] for i in unit)), unit) for unit in units),
+            key=lambda item: item[0]
+        )
+        tasks = [asyncio.ensure_future(grade_unit(unit, length_bin)) for length_bin, unit in binned_units]
+        
+        total = len(request.requests)
+        completed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for index, response in await next_done:
+                    completed += 1
+                    if on_progress:
+                        on_progress(completed, total)
+                    yield index, response
+        finally:
+            # Consumer stopped early (e.g. client disconnected): drop outstanding grades
+            for task in tasks:
+                task.cancel()
     
     async def batch_grade(self, request: BatchGradingRequest) -> BatchGradingResponse:
-        """Grade multiple answers in batch"""
-        start_time = time.time()
-        results = []
-        successful = 0
-        failed = 0
+        """Grade multiple answers in batch, concurrently up to settings.grade_max_concurrency"""
+        start_ns = time.perf_counter_ns()
+        
+        results: List[GradingResponse] = [None] * len(request.requests)  # type: ignore
+        async for index, response in self.batch_grade_stream(request):
+            results[index] = response
+        successful = sum(1 for r in results if r.success)
+        failed = len(results) - successful
+        
+        total_time = (time.perf_counter_ns() - start_ns) / 1_000_000
         
-        for grading_request in request.requests:
+        return BatchGradingResponse(
+            results=results,
+            total_processed=len(request.requests),
+            total_successful=successful,
+            total_failed=failed,
+            total_processing_time_ms=total_time
+        )
+    
+    async def batch_grade_offline(self, request: BatchGradingRequest, latency_sensitive: bool = False) -> BatchGradingResponse:
+        """
+        Grade a large batch through the provider's offline batch job instead of live calls
+        
+        Small batches (below settings.offline_batch_threshold), latency-sensitive
+        requests and providers without batch support use the live batch_grade path.
+        """
+        if latency_sensitive or len(request.requests) < settings.offline_batch_threshold:
+            return await self.batch_grade(request)
+        
+        start_ns = time.perf_counter_ns()
+        items = {
+            f"request-{i}": {
+                "ideal_answer": gr.ideal_answer.content,
+                "student_answer": gr.student_answer.content,
+                "subject": gr.ideal_answer.subject,
+                "rubric": _rubric_data(gr.ideal_answer),
+                "rubric_json": gr.ideal_answer.rubric_json
+            }
+            for i, gr in enumerate(request.requests)
+        }
+        
+        try:
+            cot_results = await self.llm_service.chain_of_thought_grading_batch(items)
+        except Exception as e:
+            logger.error("Offline batch grading failed, falling back to live grading: %s", e)
+            return await self.batch_grade(request)
+        
+        elapsed = (time.perf_counter_ns() - start_ns) / 1_000_000
+        results = []
+        for i, grading_request in enumerate(request.requests):
+            cot_result = cot_results.get(f"request-{i}")
             try:
-                request_start = time.time()
-                
-                result = await self.grade_answer(
-                    grading_request.student_answer,
-                    grading_request.ideal_answer
+                if cot_result is None:
+                    raise GradingError("No result returned by the batch job")
+                result = await asyncio.to_thread(
+                    self._result_from_chain_of_thought,
+                    cot_result, grading_request.student_answer, grading_request.ideal_answer
                 )
-                
-                processing_time = (time.time() - request_start) * 1000
-                
-                response = GradingResponse(
+                results.append(GradingResponse(
                     result=result,
-                    processing_time_ms=processing_time,
+                    processing_time_ms=elapsed,
                     success=True,
                     error_message=None
-                )
-                results.append(response)
-                successful += 1
-                
+                ))
             except Exception as e:
-                logger.error(f"Failed to grade individual request: {e}")
-                
-                # Create error response
-                error_response = GradingResponse(
-                    result=None,  # This will need to be handled properly in the API # type: ignore
+                logger.error("Failed to grade individual request: %s", e)
+                results.append(GradingResponse(
+                    result=None,
                     processing_time_ms=0,
                     success=False,
                     error_message=str(e)
-                )
-                results.append(error_response)
-                failed += 1
+                ))
         
-        total_time = (time.time() - start_time) * 1000
+        successful = sum(1 for r in results if r.success)
+        total_time = (time.perf_counter_ns() - start_ns) / 1_000_000
         
         return BatchGradingResponse(
             results=results,
             total_processed=len(request.requests),
             total_successful=successful,
-            total_failed=failed,
+            total_failed=len(results) - successful,
             total_processing_time_ms=total_time
         )
-
-##############################################
\ No newline at end of file
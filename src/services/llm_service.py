@@ -2,16 +2,26 @@
 LLM Service for AI Examiner System
 Handles interactions with GitHub Models LLM provider
 """
-import json
+import io
+import re
+import hashlib
+import orjson
+import time
+import asyncio
 import logging
-from typing import Dict, Any, Optional, Union, List
+import httpx
+from functools import lru_cache
+from typing import Dict, Any, Optional, Union, List, Tuple
 from abc import ABC, abstractmethod
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception
 
-from openai import OpenAI, APIError as OpenAIAPIError
+from openai import AsyncOpenAI, APIError as OpenAIAPIError, APIConnectionError, APIStatusError, InternalServerError
+from ..utils.cache import llm_exact_cache, llm_response_cache, llm_shared_cache, prompt_cache_key
 from ..utils.config import settings, get_llm_config
+from ..utils.concurrency import CircuitBreaker, CircuitOpenError, estimate_tokens, llm_concurrency, llm_rate_limiter, llm_token_limiter
 from ..utils.prompt_templates import PromptTemplates
-from ..models.schemas import LLMProvider, LLMModel
+from ..models.schemas import ChainOfThoughtResult, LLMProvider, LLMModel
+from pydantic import ValidationError
 
 
 logger = logging.getLogger(__name__)
@@ -32,6 +42,60 @@ class LLMResponseParsingError(LLMError):
     pass
 
 
+# Fails LLM calls fast while the provider is unreachable or erroring server-side;
+# client errors (bad request, auth) mean the provider answered and do not count
+llm_circuit_breaker = CircuitBreaker(
+    fail_max=settings.llm_circuit_fail_max,
+    reset_timeout=settings.llm_circuit_reset_seconds,
+    failure_types=(APIConnectionError, InternalServerError),
+    name="LLM"
+)
+
+
+# Markdown code fence around a JSON response, with or without a language tag
+_JSON_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+
+def _dumps(payload: Any, sort_keys: bool = False) -> str:
+    """Serialize a prompt payload (rubric, key concepts) to compact JSON; indentation only costs tokens"""
+    option = orjson.OPT_SORT_KEYS if sort_keys else None
+    return orjson.dumps(payload, option=option).decode("utf-8")
+
+
+# Provider statuses worth retrying: rate limited, server error, bad gateway, unavailable, overloaded
+_RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 529})
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Connection failures, timeouts and transient provider statuses; never client errors such as 400/401"""
+    if isinstance(error, APIConnectionError):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code in _RETRYABLE_STATUS_CODES
+
+
+@lru_cache(maxsize=256)
+def _format_system_prompt(template: str, **fields: Any) -> str:
+    """Format a system prompt template, reusing the result for repeat requests on the same question
+    
+    Every grading of a question builds the same multi-KB system prompt; the
+    memoized string is also the same object each time, so hashing it is cached too
+    """
+    return template.format(**fields)
+
+
+@lru_cache(maxsize=256)
+def _system_prompt_digest(system_prompt: str) -> str:
+    """SHA-256 of a system prompt, the exact-match part of the semantic cache scope"""
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+
+def _build_messages(system_prompt: Optional[str], prompt: str) -> List[Dict[str, str]]:
+    """Chat messages with the shared instructions first, so requests share a cacheable prefix"""
+    if system_prompt:
+        return [{"role": "system", "content": system_prompt}, {"role": "user", "content": prompt}]
+    return [{"role": "user", "content": prompt}]
+
+
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers"""
     
@@ -46,15 +110,32 @@ class BaseLLMProvider(ABC):
         prompt: str, 
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        json_mode: bool = False
+        json_mode: bool = False,
+        system_prompt: Optional[str] = None,
+        stream: bool = False
     ) -> str:
-        """Generate a response from the LLM"""
+        """Generate a response from the LLM
+        
+        system_prompt carries the instructions shared by every request for a
+        question, so providers can serve it from their prompt prefix cache.
+        stream receives the completion incrementally; the full text is still returned
+        """
         pass
     
     @abstractmethod
-    def validate_connection(self) -> bool:
+    async def validate_connection(self) -> bool:
         """Validate that the LLM connection is working"""
         pass
+    
+    async def generate_batch(
+        self,
+        prompts: Dict[str, Tuple[Optional[str], str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False
+    ) -> Dict[str, Optional[str]]:
+        """Generate responses for (system_prompt, prompt) pairs through an offline batch job, keyed by custom_id"""
+        raise LLMProviderError(f"{type(self).__name__} does not support batch jobs")
 
 
 class GitHubModelsProvider(BaseLLMProvider):
@@ -64,27 +145,46 @@ class GitHubModelsProvider(BaseLLMProvider):
         super().__init__(github_token, model)
         self.github_token = github_token
         self.endpoint = endpoint
-        # Use OpenAI client with custom base URL for GitHub Models
-        self.client = OpenAI(
+        # Use OpenAI client with custom base URL for GitHub Models; one pooled
+        # HTTP client per provider keeps TCP/TLS connections alive across calls,
+        # and HTTP/2 multiplexes concurrent gradings over those connections
+        self.http_client = httpx.AsyncClient(
+            http2=settings.llm_http2,
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry_seconds
+            ),
+            timeout=httpx.Timeout(settings.llm_timeout_seconds, connect=settings.llm_connect_timeout_seconds)
+        )
+        self.client = AsyncOpenAI(
             api_key=github_token,
-            base_url=endpoint
+            base_url=endpoint,
+            http_client=self.http_client,
+            # Retries are handled by the tenacity policy on generate_response
+            max_retries=0
         )
     
     @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type(OpenAIAPIError)
+        # MAX_RETRIES is the total number of attempts, as with the original fixed policy
+        stop=stop_after_attempt(max(1, settings.max_retries)),
+        # Full jitter spreads retries from concurrent gradings instead of retrying in lockstep
+        wait=wait_random_exponential(multiplier=2, max=60),
+        retry=retry_if_exception(_is_retryable),
+        reraise=True
     )
     async def generate_response(
         self, 
         prompt: str, 
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        json_mode: bool = False
+        json_mode: bool = False,
+        system_prompt: Optional[str] = None,
+        stream: bool = False
     ) -> str:
         """Generate response from GitHub Models API using OpenAI client"""
         try:
-            messages = [{"role": "user", "content": prompt}]
+            messages = _build_messages(system_prompt, prompt)
             
             kwargs = {
                 "model": self.model,
@@ -97,21 +197,124 @@ class GitHubModelsProvider(BaseLLMProvider):
             if json_mode and self.config.get("supports_json_mode", False):
                 kwargs["response_format"] = {"type": "json_object"}
             
-            response = self.client.chat.completions.create(**kwargs)
-            return response.choices[0].message.content
+            async with llm_circuit_breaker:
+                # Wait for both the request and token budgets before sending, so bursts
+                # queue locally instead of tripping provider 429s
+                await llm_token_limiter.acquire(estimate_tokens((system_prompt or "") + prompt, kwargs["max_tokens"]))
+                async with llm_rate_limiter, llm_concurrency:
+                    if not stream:
+                        response = await self.client.chat.completions.create(**kwargs)
+                        content = response.choices[0].message.content
+                        finish_reason = response.choices[0].finish_reason
+                    else:
+                        # Long completions arrive as they are generated, so the read timeout
+                        # applies between chunks rather than to the whole completion
+                        parts = []
+                        finish_reason = None
+                        async for chunk in await self.client.chat.completions.create(stream=True, **kwargs):
+                            if chunk.choices:
+                                if chunk.choices[0].delta.content:
+                                    parts.append(chunk.choices[0].delta.content)
+                                finish_reason = chunk.choices[0].finish_reason or finish_reason
+                        content = "".join(parts)
                 
+        except CircuitOpenError as e:
+            # Not retried: fail the call immediately while the provider is down
+            raise LLMProviderError(str(e))
         except OpenAIAPIError as e:
+            if _is_retryable(e):
+                # Transient: propagate so the retry decorator backs off and tries again
+                raise
             logger.error(f"GitHub Models API error: {e}")
             raise LLMProviderError(f"GitHub Models API error: {e}")
         except Exception as e:
             logger.error(f"Unexpected error in GitHub Models provider: {e}")
             raise LLMError(f"Unexpected error: {e}")
+        
+        if json_mode and finish_reason == "length":
+            # JSON cut off at max_tokens never parses: reject it before any parse attempt or caching
+            logger.warning(f"GitHub Models response truncated at {kwargs['max_tokens']} tokens")
+            raise LLMResponseParsingError(f"Response truncated at max_tokens={kwargs['max_tokens']}")
+        return content
+    
+    async def generate_batch(
+        self,
+        prompts: Dict[str, Tuple[Optional[str], str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False
+    ) -> Dict[str, Optional[str]]:
+        """Run prompts through the Batch API (JSONL upload, poll, download)
+        
+        Returns the response text per custom_id; None for requests that failed
+        """
+        body = {
+            "model": self.model,
+            "temperature": temperature or self.config["temperature"],
+            "max_tokens": max_tokens or self.config["max_tokens"]
+        }
+        if json_mode and self.config.get("supports_json_mode", False):
+            body["response_format"] = {"type": "json_object"}
+        
+        lines = [
+            orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {**body, "messages": _build_messages(system_prompt, prompt)}
+            })
+            for custom_id, (system_prompt, prompt) in prompts.items()
+        ]
+        
+        # Batch API calls are not covered by the generate_response retry policy; the
+        # SDK counts retries after the first attempt
+        client = self.client.with_options(max_retries=max(0, settings.max_retries - 1))
+        try:
+            input_file = await client.files.create(
+                file=("batch_input.jsonl", io.BytesIO(b"\n".join(lines))),
+                purpose="batch"
+            )
+            batch = await client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted batch {batch.id} with {len(lines)} requests")
+            
+            deadline = time.monotonic() + settings.offline_batch_timeout_seconds
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                if time.monotonic() > deadline:
+                    await client.batches.cancel(batch.id)
+                    raise LLMProviderError(f"Batch {batch.id} timed out")
+                await asyncio.sleep(settings.offline_batch_poll_seconds)
+                batch = await client.batches.retrieve(batch.id)
+            
+            if batch.status != "completed" or not batch.output_file_id:
+                raise LLMProviderError(f"Batch {batch.id} ended with status {batch.status}")
+            
+            output = (await client.files.content(batch.output_file_id)).text
+            
+        except LLMError:
+            raise
+        except OpenAIAPIError as e:
+            logger.error(f"GitHub Models batch API error: {e}")
+            raise LLMProviderError(f"GitHub Models batch API error: {e}")
+        
+        responses: Dict[str, Optional[str]] = {custom_id: None for custom_id in prompts}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            item = orjson.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") == 200:
+                responses[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return responses
     
-    def validate_connection(self) -> bool:
+    async def validate_connection(self) -> bool:
         """Validate GitHub Models connection"""
         try:
             # Simple test using the OpenAI client
-            self.client.chat.completions.create(
+            await self.client.chat.completions.create(
                 model=self.model,
                 messages=[{"role": "user", "content": "Hello"}],
                 max_tokens=10
@@ -126,6 +329,8 @@ class LLMService:
     
     def __init__(self):
         self.provider: Optional[BaseLLMProvider] = None
+        # Provider calls in flight, keyed on prompt_cache_key()
+        self._inflight: Dict[str, asyncio.Task] = {}
         self.initialize_provider()
     
     def initialize_provider(self) -> None:
@@ -149,21 +354,94 @@ class LLMService:
             logger.error(f"Failed to initialize LLM provider: {e}")
             raise
     
+    async def _generate(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        system_prompt: Optional[str] = None,
+        stream: bool = False
+    ) -> str:
+        """Generate a response, serving repeated requests from the LLM response caches
+        
+        Byte-identical requests (up to whitespace) hit the exact cache, in process first
+        and then in the shared Redis tier when configured. With
+        settings.llm_semantic_cache_enabled, near-duplicates hit the semantic cache,
+        which only holds requests with a system prompt: the
+        model, sampling settings and system prompt must match exactly and only the user
+        message is compared by similarity, so prompts built from the same template
+        never match each other. Identical requests already in flight share one call
+        """
+        request_key = prompt_cache_key(self.provider.model, prompt, system_prompt, temperature, max_tokens, json_mode)
+        if settings.llm_cache_enabled:
+            cached = llm_exact_cache.get(request_key)
+            if cached is not None:
+                logger.debug("LLM exact cache hit")
+                return cached
+            cached = await llm_shared_cache.get(request_key)
+            if cached is not None:
+                logger.debug("LLM shared cache hit")
+                # Promote so the next hit stays in process
+                llm_exact_cache.set(request_key, cached)
+                return cached
+        
+        cache_scope = None
+        if settings.llm_cache_enabled and settings.llm_semantic_cache_enabled and system_prompt:
+            cache_scope = (
+                self.provider.model,
+                round(temperature or 0.0, 1),
+                max_tokens,
+                json_mode,
+                _system_prompt_digest(system_prompt)
+            )
+            cached = llm_response_cache.lookup(cache_scope, prompt)
+            if cached is not None:
+                logger.debug("LLM response cache hit")
+                return cached
+        
+        task = self._inflight.get(request_key)
+        if task is not None:
+            logger.debug("Joining in-flight LLM request")
+            # Shielded so a cancelled follower does not cancel the shared call
+            return await asyncio.shield(task)
+        
+        task = asyncio.ensure_future(self.provider.generate_response(
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            json_mode=json_mode,
+            system_prompt=system_prompt,
+            stream=stream
+        ))
+        self._inflight[request_key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(request_key, None))
+        response = await asyncio.shield(task)
+        
+        if settings.llm_cache_enabled:
+            llm_exact_cache.set(request_key, response)
+            await llm_shared_cache.set(request_key, response)
+        if cache_scope is not None:
+            llm_response_cache.store(cache_scope, prompt, response)
+        return response
+    
 ################################################
     
     async def extract_key_concepts(self, ideal_answer: str, subject: str, topic: str) -> List[Dict[str, Any]]:
         """Extract key concepts from an ideal answer"""
-        prompt = PromptTemplates.CONCEPT_EXTRACTION.format(
+        # The instructions are identical for every question and go first, as the system prompt
+        prompt = PromptTemplates.CONCEPT_EXTRACTION_USER.format(
             ideal_answer=ideal_answer,
             subject=subject,
             topic=topic
         )
         
         try:
-            response = await self.provider.generate_response(
+            response = await self._generate(
                 prompt=prompt,
                 temperature=settings.concept_extraction_temperature,
-                json_mode=True
+                json_mode=True,
+                system_prompt=PromptTemplates.CONCEPT_EXTRACTION
             )
             
             # Parse JSON response
@@ -175,21 +453,61 @@ class LLMService:
             raise LLMError(f"Failed to extract key concepts: {e}")
     
     
+    async def extract_key_concepts_offline(self, items: Dict[str, Tuple[str, str, str]]) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """Key concept extraction for many ideal answers through the provider's offline batch job
+        
+        items maps a custom_id to (ideal_answer, subject, topic); returns the extracted
+        concepts per custom_id, None where the request failed
+        """
+        prompts = {
+            custom_id: (
+                PromptTemplates.CONCEPT_EXTRACTION,
+                PromptTemplates.CONCEPT_EXTRACTION_USER.format(
+                    ideal_answer=ideal_answer,
+                    subject=subject,
+                    topic=topic
+                )
+            )
+            for custom_id, (ideal_answer, subject, topic) in items.items()
+        }
+        
+        try:
+            responses = await self.provider.generate_batch(
+                prompts,
+                temperature=settings.concept_extraction_temperature,
+                json_mode=True
+            )
+        except Exception as e:
+            logger.error(f"Error in batch key concept extraction: {e}")
+            raise LLMError(f"Failed to extract key concepts in batch: {e}")
+        
+        results: Dict[str, Optional[List[Dict[str, Any]]]] = {}
+        for custom_id, response in responses.items():
+            try:
+                results[custom_id] = self._parse_json_response(response).get("key_concepts") if response else None
+            except LLMResponseParsingError:
+                results[custom_id] = None
+        return results
+    
+    
     async def analyze_semantic_similarity(self, ideal_answer: str, student_answer: str, key_concepts: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze semantic similarity between ideal and student answers"""
-        key_concepts_str = json.dumps(key_concepts, indent=2)
+        # sort_keys keeps the system prompt byte-identical across a question's answers
+        key_concepts_str = _dumps(key_concepts, sort_keys=True)
         
-        prompt = PromptTemplates.SEMANTIC_ANALYSIS.format(
+        system_prompt = _format_system_prompt(
+            PromptTemplates.SEMANTIC_ANALYSIS,
             ideal_answer=ideal_answer,
-            student_answer=student_answer,
             key_concepts=key_concepts_str
         )
+        prompt = PromptTemplates.SEMANTIC_ANALYSIS_USER.format(student_answer=student_answer)
         
         try:
-            response = await self.provider.generate_response(
+            response = await self._generate(
                 prompt=prompt,
                 temperature=settings.grading_temperature,
-                json_mode=True
+                json_mode=True,
+                system_prompt=system_prompt
             )
             
             return self._parse_json_response(response)
@@ -199,28 +517,79 @@ class LLMService:
             raise LLMError(f"Failed to analyze semantic similarity: {e}")
     
     
-    async def apply_grading_rubric(self, ideal_answer: str, student_answer: str, rubric: Dict[str, Any], concept_evaluations: List[Dict[str, Any]], semantic_analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Apply grading rubric to calculate final score and feedback"""
-        rubric_str = json.dumps(rubric, indent=2)
-        concept_evaluations_str = json.dumps(concept_evaluations, indent=2)
+    async def analyze_semantic_similarity_batch(self, ideal_answer: str, student_answers: List[str], key_concepts: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Analyze several student answers to the same question in one LLM call
+        
+        Returns one analysis per input answer, in order; None where the model
+        left an answer out so the caller can fall back to a single-answer call
+        """
+        key_concepts_str = _dumps(key_concepts)
+        student_answers_str = "\n".join(
+            f'<answer id={i}>\n{answer}\n</answer>' for i, answer in enumerate(student_answers)
+        )
+        
+        system_prompt = _format_system_prompt(
+            PromptTemplates.SEMANTIC_ANALYSIS_BATCH,
+            ideal_answer=ideal_answer,
+            key_concepts=key_concepts_str
+        )
+        prompt = PromptTemplates.SEMANTIC_ANALYSIS_BATCH_USER.format(student_answers=student_answers_str)
+        
+        try:
+            response = await self._generate(
+                prompt=prompt,
+                temperature=settings.grading_temperature,
+                json_mode=True,
+                system_prompt=system_prompt
+            )
+            
+            parsed_response = self._parse_json_response(response)
+            
+        except Exception as e:
+            logger.error(f"Error analyzing semantic similarity batch: {e}")
+            raise LLMError(f"Failed to analyze semantic similarity batch: {e}")
+        
+        analyses: List[Optional[Dict[str, Any]]] = [None] * len(student_answers)
+        for result in parsed_response.get("results", []):
+            try:
+                answer_id = int(result.get("answer_id"))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= answer_id < len(analyses):
+                analyses[answer_id] = result
+        return analyses
+    
+    
+    async def apply_grading_rubric(self, ideal_answer: str, student_answer: str, rubric: Dict[str, Any], concept_evaluations: List[Dict[str, Any]], semantic_analysis: Dict[str, Any], rubric_json: Optional[str] = None) -> Dict[str, Any]:
+        """Apply grading rubric to calculate final score and feedback
+        
+        rubric_json, when given, is a pre-serialized rubric (e.g. Question_Bank.rubric_json)
+        used verbatim in the prompt instead of serializing rubric
+        """
+        rubric_str = rubric_json or _dumps(rubric, sort_keys=True)
+        concept_evaluations_str = _dumps(concept_evaluations)
         passing_threshold = rubric.get("passing_threshold", 60)
         
-        prompt = PromptTemplates.GRADING_RUBRIC_APPLICATION.format(
+        system_prompt = _format_system_prompt(
+            PromptTemplates.GRADING_RUBRIC_APPLICATION,
             ideal_answer=ideal_answer,
-            student_answer=student_answer,
             rubric=rubric_str,
+            passing_threshold_percent=passing_threshold
+        )
+        prompt = PromptTemplates.GRADING_RUBRIC_APPLICATION_USER.format(
+            student_answer=student_answer,
             concept_evaluations=concept_evaluations_str,
             semantic_similarity=semantic_analysis.get("overall_semantic_similarity", 0),
             coherence_score=semantic_analysis.get("coherence_score", 0),
-            completeness_score=semantic_analysis.get("completeness_score", 0),
-            passing_threshold_percent=passing_threshold
+            completeness_score=semantic_analysis.get("completeness_score", 0)
         )
         
         try:
-            response = await self.provider.generate_response(
+            response = await self._generate(
                 prompt=prompt,
                 temperature=settings.grading_temperature,
-                json_mode=True
+                json_mode=True,
+                system_prompt=system_prompt
             )
             
             return self._parse_json_response(response)
@@ -230,45 +599,186 @@ class LLMService:
             raise LLMError(f"Failed to apply grading rubric: {e}")
     
     
-    async def chain_of_thought_grading(self, ideal_answer: str, student_answer: str, subject: str, rubric: Dict[str, Any]) -> Dict[str, Any]:
+    async def chain_of_thought_grading(self, ideal_answer: str, student_answer: str, subject: str, rubric: Dict[str, Any], rubric_json: Optional[str] = None) -> ChainOfThoughtResult:
         """Perform comprehensive Chain-of-Thought grading"""
-        rubric_str = json.dumps(rubric, indent=2)
+        system_prompt, prompt = self._chain_of_thought_prompt(ideal_answer, student_answer, subject, rubric, rubric_json)
+        
+        try:
+            response = await self._generate(
+                prompt=prompt,
+                temperature=settings.grading_temperature,
+                json_mode=True,
+                system_prompt=system_prompt,
+                stream=settings.llm_stream_responses
+            )
+            
+            return self._parse_chain_of_thought(response)
+            
+        except Exception as e:
+            logger.error(f"Error in chain-of-thought grading: {e}")
+            raise LLMError(f"Failed to perform chain-of-thought grading: {e}")
+    
+    
+    async def chain_of_thought_grading_multi(self, ideal_answer: str, student_answers: List[str], subject: str, rubric: Dict[str, Any], rubric_json: Optional[str] = None) -> List[Optional[ChainOfThoughtResult]]:
+        """Chain-of-Thought grading for several answers to the same question in one LLM call
+        
+        The ideal answer and rubric are sent once for the whole pack. Returns one
+        result per input answer, in order; None where the model left an answer out
+        or returned an invalid result, so the caller can fall back to a single-answer call
+        """
+        system_prompt, _ = self._chain_of_thought_prompt(ideal_answer, "", subject, rubric, rubric_json)
+        student_answers_str = "\n".join(
+            f'<answer id={i}>\n{answer}\n</answer>' for i, answer in enumerate(student_answers)
+        )
+        prompt = PromptTemplates.CHAIN_OF_THOUGHT_GRADING_MULTI_USER.format(
+            student_answers=student_answers_str,
+            answer_count=len(student_answers)
+        )
+        
+        try:
+            response = await self._generate(
+                prompt=prompt,
+                temperature=settings.grading_temperature,
+                max_tokens=self.provider.config["max_tokens"] * len(student_answers),
+                json_mode=True,
+                system_prompt=system_prompt,
+                stream=settings.llm_stream_responses
+            )
+            
+            parsed_response = self._parse_json_response(response)
+            
+        except Exception as e:
+            logger.error(f"Error in multi-answer chain-of-thought grading: {e}")
+            raise LLMError(f"Failed to perform multi-answer chain-of-thought grading: {e}")
+        
+        results: List[Optional[ChainOfThoughtResult]] = [None] * len(student_answers)
+        for result in parsed_response.get("results", []):
+            try:
+                answer_id = int(result.get("answer_id"))
+                if 0 <= answer_id < len(results):
+                    results[answer_id] = ChainOfThoughtResult.model_validate(result)
+            except (AttributeError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping invalid multi-answer chain-of-thought result: {e}")
+        return results
+    
+    
+    async def grade_fused(self, ideal_answer: str, student_answer: str, subject: str, topic: str, rubric: Dict[str, Any], rubric_json: Optional[str] = None, key_concepts: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Extract key concepts, analyze semantic similarity and apply the rubric in one call
+        
+        When key_concepts are given the model reuses them instead of extracting new ones.
+        Returns a dict with "key_concepts", "semantic_analysis" and "rubric_result",
+        shaped like the outputs of the three separate calls
+        """
+        rubric_str = rubric_json or _dumps(rubric)
+        passing_threshold = rubric.get("passing_threshold", 60)
         
-        prompt = PromptTemplates.CHAIN_OF_THOUGHT_GRADING.format(
+        system_prompt = _format_system_prompt(
+            PromptTemplates.FUSED_GRADING,
             ideal_answer=ideal_answer,
-            student_answer=student_answer,
             subject=subject,
-            rubric=rubric_str
+            topic=topic,
+            rubric=rubric_str,
+            passing_threshold_percent=passing_threshold
         )
+        if key_concepts:
+            system_prompt += PromptTemplates.FUSED_GRADING_KEY_CONCEPTS.format(
+                key_concepts=_dumps(key_concepts)
+            )
+        prompt = PromptTemplates.FUSED_GRADING_USER.format(student_answer=student_answer)
         
         try:
-            response = await self.provider.generate_response(
+            response = await self._generate(
                 prompt=prompt,
                 temperature=settings.grading_temperature,
-                json_mode=True
+                json_mode=True,
+                system_prompt=system_prompt
             )
             
-            return self._parse_json_response(response)
+            parsed_response = self._parse_json_response(response)
             
         except Exception as e:
-            logger.error(f"Error in chain-of-thought grading: {e}")
-            raise LLMError(f"Failed to perform chain-of-thought grading: {e}")
+            logger.error(f"Error in fused grading: {e}")
+            raise LLMError(f"Failed to perform fused grading: {e}")
+        
+        return {
+            "key_concepts": parsed_response.get("key_concepts", []),
+            "semantic_analysis": parsed_response.get("semantic_analysis", {}),
+            "rubric_result": parsed_response.get("rubric_result", {})
+        }
+    
+    
+    async def chain_of_thought_grading_batch(self, items: Dict[str, Dict[str, Any]]) -> Dict[str, Optional[ChainOfThoughtResult]]:
+        """Chain-of-Thought grading for many answers through the provider's offline batch job
+        
+        items maps a custom_id to the chain_of_thought_grading keyword arguments;
+        returns the parsed result per custom_id, None where the request failed
+        """
+        prompts = {
+            custom_id: self._chain_of_thought_prompt(**item)
+            for custom_id, item in items.items()
+        }
+        
+        try:
+            responses = await self.provider.generate_batch(
+                prompts,
+                temperature=settings.grading_temperature,
+                json_mode=True
+            )
+        except Exception as e:
+            logger.error(f"Error in batch chain-of-thought grading: {e}")
+            raise LLMError(f"Failed to perform batch chain-of-thought grading: {e}")
+        
+        results: Dict[str, Optional[ChainOfThoughtResult]] = {}
+        for custom_id, response in responses.items():
+            try:
+                results[custom_id] = self._parse_chain_of_thought(response) if response else None
+            except LLMResponseParsingError:
+                results[custom_id] = None
+        return results
+    
+    
+    def _chain_of_thought_prompt(self, ideal_answer: str, student_answer: str, subject: str, rubric: Dict[str, Any], rubric_json: Optional[str] = None) -> Tuple[str, str]:
+        """(system_prompt, prompt) for Chain-of-Thought grading"""
+        rubric_str = rubric_json or _dumps(rubric, sort_keys=True)
+        
+        system_prompt = _format_system_prompt(
+            PromptTemplates.CHAIN_OF_THOUGHT_GRADING,
+            ideal_answer=ideal_answer,
+            subject=subject,
+            rubric=rubric_str
+        )
+        prompt = PromptTemplates.CHAIN_OF_THOUGHT_GRADING_USER.format(student_answer=student_answer)
+        return system_prompt, prompt
+    
+    
+    def _strip_json_fence(self, response: str) -> str:
+        """Remove any potential markdown formatting around a JSON response"""
+        # JSON mode responses are bare; a substring check is a single C-level scan,
+        # whereas the regex retries its trailing alternative at every position
+        if "```" not in response:
+            return response
+        return _JSON_FENCE_RE.sub("", response)
+    
+    
+    def _parse_chain_of_thought(self, response: str) -> ChainOfThoughtResult:
+        """Decode and validate a Chain-of-Thought response in one pass"""
+        try:
+            return ChainOfThoughtResult.model_validate_json(self._strip_json_fence(response))
+            
+        except ValidationError as e:
+            logger.error(f"Failed to parse chain-of-thought response: {e}")
+            logger.debug(f"Raw response: {response}")
+            raise LLMResponseParsingError(f"Invalid chain-of-thought response: {e}")
     
     
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """Parse JSON response with error handling"""
         try:
-            # Remove any potential markdown formatting
-            response = response.strip()
-            if response.startswith("```json"):
-                response = response[7:]
-            if response.endswith("```"):
-                response = response[:-3]
-            response = response.strip()
+            response = self._strip_json_fence(response)
             
-            return json.loads(response)
+            return orjson.loads(response)
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON response: {e}")
             logger.debug(f"Raw response: {response}")
             raise LLMResponseParsingError(f"Invalid JSON response: {e}")
@@ -279,7 +789,7 @@ class LLMService:
         if not self.provider:
             return False
         
-        return self.provider.validate_connection()
+        return await self.provider.validate_connection()
     
     
     async def get_provider_info(self) -> Dict[str, Any]:
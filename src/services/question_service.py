@@ -9,10 +9,12 @@ from types import SimpleNamespace
 import uuid
 from sqlalchemy import text
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
 from ..utils.database_manager import DatabaseManager
 from src.models.question_model import Question
+from src.utils.cache import question_cache, question_model_cache, question_shared_cache
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +24,9 @@ def _row_to_ns(row: Any) -> SimpleNamespace:
     if row is None:
         return None  # type: ignore
     try:
-        mapping = row._mapping  # SQLAlchemy 1.4/2.0 RowMapping
-        return SimpleNamespace(**dict(mapping))
+        return SimpleNamespace(**row._mapping)  # SQLAlchemy 1.4/2.0 RowMapping
     except AttributeError:
-        return SimpleNamespace(**dict(row))
+        return SimpleNamespace(**row._asdict())
 
 
 class QuestionService:
@@ -36,25 +37,45 @@ class QuestionService:
     def get_session(self) -> Session:
         """Get database session"""
         return self.db_manager.get_session()
+    
+    def get_async_session(self) -> AsyncSession:
+        """Get async database session"""
+        return self.db_manager.get_async_session()
 
 
 ###########################################
 
     async def get_question_by_id(self, question_id: int) -> Optional[Question]:
-        session = self.get_session()
+        # In-process tier first, then the shared (Redis) tier, then the database
+        cached = question_model_cache.get(question_id)
+        if cached is not None:
+            return cached
+        shared = await question_shared_cache.get(str(question_id))
+        if shared is not None:
+            cached = Question.model_validate_json(shared)
+            question_model_cache.set(question_id, cached)
+            return cached
+        
+        session = self.get_async_session()
         try:
-            q_sql = text("SELECT TOP 1 * FROM Question_Bank WHERE question_id = :qid")
-            row = session.execute(q_sql, {"qid": question_id}).fetchone()
+            # Key concept readiness is probed in the same round-trip; only existence is needed
+            q_sql = text(
+                """
+                SELECT TOP 1 q.question_id, q.subject, q.topic, q.question_text, q.ideal_answer, q.max_marks, q.passing_threshold,
+                       CASE WHEN EXISTS (
+                           SELECT 1 FROM Question_KeyConcept kc WHERE kc.question_id = q.question_id
+                       ) THEN 1 ELSE 0 END AS concepts_ready
+                FROM Question_Bank q
+                WHERE q.question_id = :qid
+                """
+            )
+            row = (await session.execute(q_sql, {"qid": question_id})).fetchone()
             if not row:
                 return None
 
             # Convert SQLAlchemy row to object-like namespace
             question = _row_to_ns(row)
-
-            # Count associated key concepts
-            count_sql = text("SELECT COUNT(*) AS cnt FROM Question_KeyConcept WHERE question_id = :qid")
-            cnt_row = session.execute(count_sql, {"qid": question.question_id}).fetchone()
-            key_concepts_count = cnt_row[0] if cnt_row else 0
+            concepts_ready = bool(question.concepts_ready)
 
             # Build and return model instance
             result = Question(
@@ -67,7 +88,9 @@ class QuestionService:
                 passing_threshold=question.passing_threshold
             )
 
-            logger.info(f"Retrieved question {question_id} with {key_concepts_count} key concepts")
+            logger.info(f"Retrieved question {question_id} (key concepts ready: {concepts_ready})")
+            question_model_cache.set(question_id, result)
+            await question_shared_cache.set(str(question_id), result.model_dump_json())
             return result
 
         except SQLAlchemyError as e:
@@ -75,18 +98,24 @@ class QuestionService:
             return None
 
         finally:
-            session.close()
+            await session.close()
     
     
     async def get_all_questions(self) -> List[Question]:
         """Get all questions from the database as a list of Question models"""
-        session = self.get_session()
+        session = self.get_async_session()
         questions: List[Question] = []
 
         try:
             # Fetch all question rows ordered by creation time
-            q_sql = text("SELECT * FROM Question_Bank ORDER BY Question_ID DESC")
-            rows = session.execute(q_sql).fetchall()
+            q_sql = text(
+                """
+                SELECT question_id, subject, topic, question_text, ideal_answer, max_marks, passing_threshold
+                FROM Question_Bank
+                ORDER BY Question_ID DESC
+                """
+            )
+            rows = (await session.execute(q_sql)).fetchall()
 
             for row in rows:
                 q = _row_to_ns(row)
@@ -110,14 +139,14 @@ class QuestionService:
             return []
 
         finally:
-            session.close()
+            await session.close()
     
 
     async def create_question(self, question_id: int, subject: str, topic: str, question_text: str, ideal_answer: str, max_marks: float, passing_threshold: float = 60.0) -> SimpleNamespace:
         """Create a new question with ideal answer (raw SQL)"""
-        session = self.get_session()
+        session = self.get_async_session()
         try:
-            row = session.execute(text(
+            row = (await session.execute(text(
                 """
                 INSERT INTO Question_Bank (
                     question_id, subject, topic, question_text, ideal_answer, max_marks, passing_threshold
@@ -133,31 +162,41 @@ class QuestionService:
                 "ideal_answer": ideal_answer,
                 "max_marks": max_marks,
                 "passing_threshold": passing_threshold,
-            }).fetchone()
+            })).fetchone()
             
             qid = row[0] if row else None
-            sel = session.execute(text("SELECT * FROM Question_Bank WHERE question_id = :id"), {"id": qid}).fetchone()
-            session.commit()
+            sel = (await session.execute(text(
+                """
+                SELECT id, question_id, subject, topic, question_text, ideal_answer, max_marks, passing_threshold
+                FROM Question_Bank
+                WHERE question_id = :id
+                """
+            ), {"id": qid})).fetchone()
+            await session.commit()
+            # Drop any cached copy of a question previously stored under this id
+            question_model_cache.pop(question_id)
+            question_cache.pop(question_id)
+            await question_shared_cache.delete(str(question_id))
             logger.info(f"Created question {question_id}")
             return _row_to_ns(sel)
         except SQLAlchemyError as e:
-            session.rollback()
+            await session.rollback()
             logger.error(f"Error creating question {question_id}: {e}")
             raise
         finally:
-            session.close()
+            await session.close()
     
     
     async def create_student_answer(self, student_id: int, question_id: int, answer_text: str, language: str = "en") -> SimpleNamespace:
         """Create a new student answer (raw SQL)"""
-        session = self.get_session()
+        session = self.get_async_session()
         try:
-            qrow = session.execute(text("SELECT id FROM Question_Bank WHERE question_id = :qid"), {"qid": question_id}).fetchone()
+            qrow = (await session.execute(text("SELECT id FROM Question_Bank WHERE question_id = :qid"), {"qid": question_id})).fetchone()
             if not qrow:
                 raise ValueError(f"Question {question_id} not found")
             qid = qrow[0]
             wc = len((answer_text or "").split())
-            row = session.execute(text(
+            row = (await session.execute(text(
                 """
                 INSERT INTO Student_Answers (
                     answer_id, student_id, question_id, answer_text, language, word_count, submitted_at
@@ -172,43 +211,70 @@ class QuestionService:
                 "answer_text": answer_text,
                 "language": language,
                 "word_count": wc,
-            }).fetchone()
+            })).fetchone()
             
             aid = row[0] if row else None
-            sel = session.execute(text("SELECT * FROM Student_Answers WHERE id = :id"), {"id": aid}).fetchone()
-            session.commit()
+            sel = (await session.execute(text(
+                """
+                SELECT id, answer_id, student_id, question_id, answer_text, language, word_count, submitted_at
+                FROM Student_Answers
+                WHERE id = :id
+                """
+            ), {"id": aid})).fetchone()
+            await session.commit()
             logger.info(f"Created student answer for {student_id}, question {question_id}")
             return _row_to_ns(sel)
         except SQLAlchemyError as e:
-            session.rollback()
+            await session.rollback()
             logger.error(f"Error creating student answer: {e}")
             raise
         finally:
-            session.close()
+            await session.close()
     
 
     async def get_grading_results_by_student(self, student_id: int) -> List[Dict[str, Any]]:
         """Get all grading results for a student (raw SQL)"""
-        session = self.get_session()
+        session = self.get_async_session()
         try:
-            rows = session.execute(text(
+            # Results and their concept evaluations in one round-trip, one row per
+            # evaluation (or a single row with NULL evaluation columns)
+            rows = (await session.execute(text(
                 """
-                SELECT gr.*
+                SELECT gr.id, gr.result_id, gr.total_score, gr.max_possible_score, gr.percentage, gr.passed,
+                       gr.detailed_feedback, gr.processing_time_ms, gr.confidence_score,
+                       ce.id AS evaluation_id, ce.points_awarded, ce.points_possible, ce.explanation, kc.concept_name
                 FROM grading_results gr
                 INNER JOIN Student_Answers sa ON gr.student_answer_id = sa.id
+                LEFT JOIN Concept_Evaluations ce ON ce.grading_result_id = gr.id
+                LEFT JOIN Question_KeyConcept kc ON ce.key_concept_id = kc.key_id
                 WHERE sa.student_id = :student_id
-                ORDER BY gr.graded_at DESC
+                ORDER BY gr.graded_at DESC, gr.id, ce.id
                 """
-            ), {"student_id": student_id}).fetchall()
-            formatted_results: List[Dict[str, Any]] = []
+            ), {"student_id": student_id})).fetchall()
+            formatted_results: Dict[Any, Dict[str, Any]] = {}
             for row in rows:
-                formatted_results.append(self._format_grading_response_raw(_row_to_ns(row), session))
-            return formatted_results
+                formatted = formatted_results.get(row.id)
+                if formatted is None:
+                    formatted = formatted_results[row.id] = {
+                        "Score": f"{row.total_score:.1f}/{row.max_possible_score}",
+                        "Justification": row.detailed_feedback,
+                        "Key_Concepts_Covered": [],
+                        "Percentage": f"{row.percentage:.1f}%",
+                        "Passed": row.passed,
+                        "ProcessingTimeMs": row.processing_time_ms,
+                        "ConfidenceScore": row.confidence_score,
+                        "GradingResultId": row.result_id,
+                    }
+                if row.evaluation_id is not None:
+                    formatted["Key_Concepts_Covered"].append(
+                        f"{row.concept_name} ({row.points_awarded:.1f}/{row.points_possible:.1f} points) - {row.explanation}"
+                    )
+            return list(formatted_results.values())
         except SQLAlchemyError as e:
             logger.error(f"Error retrieving grading results for student {student_id}: {e}")
             return []
         finally:
-            session.close()
+            await session.close()
 
 ###########################################
 
@@ -2,55 +2,310 @@
 RAG (Retrieval-Augmented Generation) Service for AI Examiner System
 Handles question retrieval, key concept extraction, and student answer processing
 """
-import json
+import gzip
 import uuid
+import asyncio
+import orjson
 import time
+import numpy as np
 import logging
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from types import SimpleNamespace
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
 from src.models.question_model import Question, KeyConcept
-from src.utils.database_manager import DatabaseManager
+from src.utils.database_manager import DatabaseManager, JSONText
 from .llm_service import llm_service
+from .write_behind import WriteBehindWriter
 from src.utils.config import settings
+from src.utils.concurrency import grading_semaphore
+from src.utils.cache import (
+    answer_cache_key, exact_grade_cache, question_cache, question_concepts_cache, rubric_cache, semantic_grade_cache
+)
 
 logger = logging.getLogger(__name__)
 
+# SQL statements built once at import; text() parses bind params on construction
+_SQL_GET_QUESTION = text(
+    """
+    SELECT TOP 1 id, question_id, subject, topic, ideal_answer, max_marks, passing_threshold, rubric_json
+    FROM Question_Bank
+    WHERE question_id = :qid
+    """
+)
+
+_SQL_GET_KEY_CONCEPTS = text(
+    """
+    SELECT key_id, question_id, concept_name, concept_description, importance_score, keywords, max_points
+    FROM Question_KeyConcept
+    WHERE question_id = :question_id
+    """
+).columns(keywords=JSONText)
+
+# All concepts for a question in one statement; MERGE (unlike INSERT) can OUTPUT
+# the source row index, which maps each generated key_id back to its concept
+_SQL_INSERT_KEY_CONCEPTS = text(
+    """
+    MERGE Question_KeyConcept AS target
+    USING (
+        SELECT CAST(c.[key] AS INT) AS idx, j.concept_name, j.concept_description, j.importance_score, j.keywords
+        FROM OPENJSON(:concepts) AS c
+        CROSS APPLY OPENJSON(c.value) WITH (
+            concept_name NVARCHAR(255) '$.n',
+            concept_description NVARCHAR(MAX) '$.d',
+            importance_score FLOAT '$.i',
+            keywords NVARCHAR(MAX) '$.k' AS JSON
+        ) AS j
+    ) AS source
+    ON 1 = 0
+    WHEN NOT MATCHED THEN
+        INSERT (question_id, concept_name, concept_description, importance_score, keywords, max_points, created_at)
+        VALUES (:question_id, source.concept_name, source.concept_description, source.importance_score,
+                source.keywords, :max_points, :created_at)
+    OUTPUT source.idx, INSERTED.key_id;
+    """
+)
+
+# Concepts of another question with the same subject, topic and ideal answer
+# (matched on the persisted ideal_answer_hash), copied with points rescaled to
+# this question's marks. The copied rows are collected in @copied and selected
+# at the end, so the statement always returns a rowset, empty when no such
+# question exists.
+_SQL_COPY_KEY_CONCEPTS = text(
+    """
+    SET NOCOUNT ON;
+    DECLARE @copied TABLE (
+        key_id INT, question_id INT, concept_name NVARCHAR(255), concept_description NVARCHAR(MAX),
+        importance_score FLOAT, keywords NVARCHAR(MAX), max_points FLOAT
+    );
+    DECLARE @donor INT = (
+        SELECT TOP 1 q.question_id
+        FROM Question_Bank q
+        WHERE q.ideal_answer_hash = (SELECT ideal_answer_hash FROM Question_Bank WHERE question_id = :question_id)
+          AND q.question_id <> :question_id
+          AND EXISTS (SELECT 1 FROM Question_KeyConcept kc WHERE kc.question_id = q.question_id)
+    );
+    IF @donor IS NOT NULL
+        INSERT INTO Question_KeyConcept (question_id, concept_name, concept_description, importance_score, keywords, max_points, created_at)
+        OUTPUT INSERTED.key_id, INSERTED.question_id, INSERTED.concept_name, INSERTED.concept_description,
+               INSERTED.importance_score, INSERTED.keywords, INSERTED.max_points
+        INTO @copied
+        SELECT :question_id, concept_name, concept_description, importance_score, keywords,
+               :max_marks * 1.0 / COUNT(*) OVER (), :created_at
+        FROM Question_KeyConcept
+        WHERE question_id = @donor;
+    SELECT key_id, question_id, concept_name, concept_description, importance_score, keywords, max_points
+    FROM @copied;
+    """
+).columns(keywords=JSONText)
+
+_SQL_QUESTIONS_WITH_KEY_CONCEPTS = text(
+    "SELECT DISTINCT question_id FROM Question_KeyConcept WHERE question_id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+_SQL_GET_ANSWER = text(
+    """
+    SELECT TOP 1 id, answer_id, student_id, question_id, answer_text, language, submitted_at,
+           COALESCE(NULLIF(word_count, 0), word_count_calc) AS word_count
+    FROM Student_Answers
+    WHERE student_id = :student_id AND question_id = :question_id
+    """
+)
+
+_SQL_GET_ANSWERS_BULK = text(
+    """
+    SELECT id, answer_id, student_id, question_id, answer_text, language, submitted_at,
+           COALESCE(NULLIF(word_count, 0), word_count_calc) AS word_count
+    FROM Student_Answers
+    WHERE question_id = :question_id AND student_id IN :student_ids
+    """
+).bindparams(bindparam("student_ids", expanding=True))
+
+# Stored LLM output of an earlier grading of the same normalized answer text to the
+# same question (matched on the persisted answer_hash)
+_SQL_GET_DUPLICATE_GRADING = text(
+    """
+    SELECT TOP 1 gr.raw_llm_response
+    FROM Student_Answers sa
+    INNER JOIN Student_Answers dup
+        ON dup.question_id = sa.question_id AND dup.answer_hash = sa.answer_hash AND dup.id <> sa.id
+    INNER JOIN grading_results gr ON gr.student_answer_id = dup.id
+    WHERE sa.id = :sid AND gr.raw_llm_response IS NOT NULL
+    """
+)
+
+_SQL_GET_GRADING_RESULT = text(
+    """
+    SELECT TOP 1 id, result_id, total_score, max_possible_score, percentage, passed,
+           detailed_feedback, processing_time_ms, confidence_score, response_json
+    FROM grading_results
+    WHERE student_answer_id = :sid
+    """
+).columns(response_json=JSONText)
+
+_SQL_INSERT_GRADING_RESULT = text(
+    """
+    SET NOCOUNT ON;
+    -- Idempotent on result_id / student_answer_id so write-behind retries are safe
+    IF NOT EXISTS (
+        SELECT 1 FROM grading_results WHERE result_id = :result_id OR student_answer_id = :student_answer_id
+    )
+    BEGIN
+        DECLARE @gid BIGINT;
+        INSERT INTO grading_results (
+            result_id, student_answer_id, total_score, max_possible_score, percentage, passed,
+            semantic_similarity, coherence_score, completeness_score, confidence_score,
+            detailed_feedback, strengths, weaknesses, suggestions,
+            grading_model, processing_time_ms, graded_at, graded_by, raw_llm_response, criteria_scores, response_json
+        )
+        VALUES (
+            :result_id, :student_answer_id, :total_score, :max_possible_score, :percentage, :passed,
+            :semantic_similarity, :coherence_score, :completeness_score, :confidence_score,
+            :detailed_feedback, :strengths, :weaknesses, :suggestions,
+            :grading_model, :processing_time_ms, GETUTCDATE(), :graded_by, :raw_llm_response, :criteria_scores, :response_json
+        );
+        SET @gid = SCOPE_IDENTITY();
+        INSERT INTO Concept_Evaluations (
+            grading_result_id, key_concept_id, present, accuracy_score, points_awarded, points_possible,
+            explanation, evidence_text, reasoning, evaluated_at
+        )
+        SELECT
+            @gid, ce.key_concept_id, ce.present, ce.accuracy_score, ce.points_awarded, ce.points_possible,
+            ce.explanation, ce.evidence_text, ce.reasoning, GETUTCDATE()
+        FROM OPENJSON(:concept_evaluations) WITH (
+            key_concept_id INT '$.k',
+            present BIT '$.p',
+            accuracy_score FLOAT '$.a',
+            points_awarded FLOAT '$.pa',
+            points_possible FLOAT '$.pp',
+            explanation NVARCHAR(MAX) '$.e',
+            evidence_text NVARCHAR(MAX) '$.ev',
+            reasoning NVARCHAR(MAX) '$.r'
+        ) AS ce;
+    END
+    """
+)
+
+_SQL_GRADED_ANSWER_IDS = text(
+    "SELECT student_answer_id FROM grading_results WHERE student_answer_id IN :ids"
+).bindparams(bindparam("ids", expanding=True))
+
+_SQL_GET_RUBRIC_CRITERIA = text(
+    """
+    SELECT criteria_name, criteria_description, max_points, weight
+    FROM rubric_criteria
+    WHERE question_id = :qid
+    """
+)
+
+_SQL_GET_CONCEPT_EVALUATIONS = text(
+    """
+    SELECT ce.id, ce.points_awarded, ce.points_possible, ce.explanation, kc.concept_name, kc.max_points
+    FROM Concept_Evaluations ce
+    INNER JOIN Question_KeyConcept kc ON ce.key_concept_id = kc.key_id
+    WHERE ce.grading_result_id = :gid
+    ORDER BY ce.id ASC
+    """
+)
+
 def _row_to_ns(row: Any) -> SimpleNamespace:
     if row is None:
         return None  # type: ignore
     try:
-        mapping = row._mapping  # SQLAlchemy 1.4/2.0 RowMapping
-        return SimpleNamespace(**dict(mapping))
+        return SimpleNamespace(**row._mapping)  # SQLAlchemy 1.4/2.0 RowMapping
     except AttributeError:
-        return SimpleNamespace(**dict(row))
+        return SimpleNamespace(**row._asdict())
+
+
+def _key_concepts_json(concepts_data: List[Dict[str, Any]]) -> str:
+    """Short-key JSON array consumed by _SQL_INSERT_KEY_CONCEPTS"""
+    return orjson.dumps([
+        {
+            "n": concept_data["concept"],
+            "d": concept_data["explanation"],
+            "i": concept_data["importance"],
+            "k": concept_data.get("keywords", []),
+        }
+        for concept_data in concepts_data
+    ]).decode()
+
+
+def _decode_raw_llm_response(blob: bytes) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """(semantic_analysis, grading_result) from a stored raw_llm_response, None if unreadable"""
+    try:
+        stored = orjson.loads(gzip.decompress(blob).decode("utf-16-le"))
+        return stored["semantic_analysis"], stored["grading_result"]
+    except (OSError, UnicodeDecodeError, orjson.JSONDecodeError, KeyError, TypeError):
+        return None
+
+
+def _cached_grading(question_id: Any, answer_text: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """(semantic_analysis, grading_result) of an identical, then near-identical, earlier answer"""
+    cached = None
+    if settings.exact_cache_enabled:
+        cached = exact_grade_cache.get(answer_cache_key(question_id, answer_text))
+    if not cached and settings.semantic_cache_enabled:
+        cached = semantic_grade_cache.lookup(question_id, answer_text)
+    return cached or None
+
+
+_MISSING_EVALUATION = {"present": False, "accuracy_score": 0.0, "explanation": "Concept not found in student answer", "evidence": None}
+
+
+def _match_concept_evaluations(key_concepts: List[SimpleNamespace], concept_evaluations: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """Pair each key concept with the LLM's evaluation of it (None when missing)"""
+    # Index LLM concept evaluations by lowercased name once (first one wins)
+    eval_lookup: Dict[str, Dict[str, Any]] = {}
+    for eval_data in concept_evaluations:
+        eval_lookup.setdefault(eval_data.get("concept", "").lower(), eval_data)
+    matched = []
+    for c in key_concepts:
+        # Exact name match first, then fall back to substring match
+        cname = getattr(c, "concept_name_lower", None) or c.concept_name.lower()
+        matched.append(
+            eval_lookup.get(cname)
+            or next((v for k, v in eval_lookup.items() if k in cname), None)
+        )
+    return matched
 
 
 class RAGService:
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, result_writer: Optional[WriteBehindWriter] = None):
         self.db_manager = db_manager
+        self.result_writer = result_writer
     
     def get_session(self) -> Session:
         """Get database session"""
         return self.db_manager.get_session()
     
+    def get_async_session(self) -> AsyncSession:
+        """Get async database session"""
+        return self.db_manager.get_async_session()
+    
     
 #####################################################    
     
     # Step 1: Retrieve Ideal Answer and Marks
-    async def get_question_with_ideal_answer(self, question_id: int) -> Question:
-        session = self.get_session()
+    async def get_question_with_ideal_answer(self, question_id: int, session: Optional[AsyncSession] = None) -> Question:
+        """Question row for grading, cached per question_id; do not mutate the result"""
+        question = question_cache.get(question_id)
+        if question is not None:
+            return question
+        
+        owns_session = session is None
+        if owns_session:
+            session = self.get_async_session()
         try:
-            sql = text("SELECT TOP 1 * FROM Question_Bank WHERE question_id = :qid")
-            row = session.execute(sql, {"qid": question_id}).fetchone()
+            row = (await session.execute(_SQL_GET_QUESTION, {"qid": question_id})).fetchone()
             question = _row_to_ns(row)
             
             if question:
                 logger.info(f"Retrieved question {question_id}")
+                question_cache.set(question_id, question)
                 
             return question
             
@@ -58,23 +313,49 @@ class RAGService:
             logger.error(f"Database error retrieving question {question_id}: {e}")
             return None
         finally:
-            session.close()
+            if owns_session:
+                await session.close()
     
     # Step 2: Save Semantic Understanding (Key Concepts)
-    async def extract_and_save_key_concepts(self, question: Question) -> List[KeyConcept]:
-        session = self.get_session()
+    async def extract_and_save_key_concepts(self, question: Question, session: Optional[AsyncSession] = None) -> List[KeyConcept]:
+        """Key concepts of the question, extracted once and cached per question_id; do not mutate the result"""
+        cached = question_concepts_cache.get(question.question_id)
+        if cached is not None:
+            return cached
+        
+        owns_session = session is None
+        if owns_session:
+            session = self.get_async_session()
         try:
             # Check if concepts already exist
-            sql = text(
-                """
-                SELECT * FROM Question_KeyConcept WHERE question_id = :question_id
-                """
-                )
-            exist_rows = session.execute(sql, {"question_id": question.question_id}).fetchall()
+            exist_rows = (await session.execute(_SQL_GET_KEY_CONCEPTS, {"question_id": question.question_id})).fetchall()
             
             if exist_rows:
-                concepts = [_row_to_ns(r) for r in exist_rows]
+                # concept_name_lower is computed once here for evaluation matching
+                concepts = [
+                    SimpleNamespace(**r._mapping, concept_name_lower=r.concept_name.lower())
+                    for r in exist_rows
+                ]
                 logger.info(f"Using existing {len(concepts)} key concepts for question {question.question_id}")
+                question_concepts_cache.set(question.question_id, concepts)
+                return concepts
+            
+            # Reuse the concepts of a question with an identical ideal answer
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            copied = await session.execute(_SQL_COPY_KEY_CONCEPTS, {
+                "question_id": question.question_id,
+                "max_marks": question.max_marks,
+                "created_at": now,
+            })
+            copied_rows = copied.fetchall() if copied.returns_rows else []
+            if copied_rows:
+                await session.commit()
+                concepts = [
+                    SimpleNamespace(**r._mapping, created_at=now, concept_name_lower=r.concept_name.lower())
+                    for r in copied_rows
+                ]
+                logger.info(f"Copied {len(concepts)} key concepts for question {question.question_id} from an identical ideal answer")
+                question_concepts_cache.set(question.question_id, concepts)
                 return concepts
             
             # Extract key concepts using LLM
@@ -85,83 +366,127 @@ class RAGService:
                 question.topic
             )
             
-            # Calculate points per concept (distribute total marks)
-            points_per_concept = question.max_marks / len(concepts_data) if concepts_data else 0
-            
-            # Save concepts to database with OUTPUT to get inserted IDs
-            saved_concepts: List[SimpleNamespace] = []
-            insert_sql = text(
-                """
-                INSERT INTO Question_KeyConcept (
-                    question_id, concept_name, concept_description, importance_score, keywords, max_points, created_at
-                )
-                OUTPUT INSERTED.key_id
-                VALUES (
-                    :question_id, :concept_name, :concept_description, :importance_score, :keywords, :max_points, :created_at
-                )
-                """
-            )
-            now = datetime.utcnow()
-            for concept_data in concepts_data:
-                params = {
-                    "question_id": question.question_id,
-                    "concept_name": concept_data["concept"],
-                    "concept_description": concept_data["explanation"],
-                    "importance_score": concept_data["importance"],
-                    "keywords": json.dumps(concept_data.get("keywords", [])),
-                    "max_points": points_per_concept,
-                    "created_at": now,
-                }
-                
-                logger.info(f"insert_sql: {insert_sql}")
-                
-                inserted = session.execute(insert_sql, params).fetchone()
-                new_id = inserted[0] if inserted else None
-                saved_concepts.append(SimpleNamespace(key_id=new_id, **params))
-            session.commit()
+            saved_concepts = await self._save_key_concepts(session, question, concepts_data, now)
+            await session.commit()
             
             logger.info(f"Saved {len(saved_concepts)} key concepts for question {question.question_id}")
+            if saved_concepts:
+                question_concepts_cache.set(question.question_id, saved_concepts)
             
             return saved_concepts
             
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             logger.error(f"Error extracting/saving key concepts for question {question.question_id}: {e}")
             
             raise
         finally:
-            session.close()
+            if owns_session:
+                await session.close()
+    
+    async def _save_key_concepts(self, session: AsyncSession, question: SimpleNamespace, concepts_data: List[Dict[str, Any]], now: datetime) -> List[SimpleNamespace]:
+        """Insert extracted concepts for a question (without committing) and return them as saved"""
+        # Calculate points per concept (distribute total marks)
+        points_per_concept = question.max_marks / len(concepts_data) if concepts_data else 0
+        
+        # Save all concepts in one statement, with OUTPUT to get inserted IDs
+        key_ids = {}
+        if concepts_data:
+            inserted = await session.execute(_SQL_INSERT_KEY_CONCEPTS, {
+                "question_id": question.question_id,
+                "concepts": _key_concepts_json(concepts_data),
+                "max_points": points_per_concept,
+                "created_at": now,
+            })
+            key_ids = {idx: key_id for idx, key_id in inserted.fetchall()}
+        
+        return [
+            SimpleNamespace(
+                key_id=key_ids.get(idx),
+                question_id=question.question_id,
+                concept_name=concept_data["concept"],
+                concept_description=concept_data["explanation"],
+                importance_score=concept_data["importance"],
+                keywords=concept_data.get("keywords", []),
+                max_points=points_per_concept,
+                created_at=now,
+                concept_name_lower=concept_data["concept"].lower()
+            )
+            for idx, concept_data in enumerate(concepts_data)
+        ]
+    
+    async def bulk_extract_and_save_key_concepts(self, questions: List[SimpleNamespace]) -> Dict[int, Any]:
+        """
+        Key concepts for many questions, keyed by question_id (the exception raised
+        for a question in place of its concepts).
+        
+        When at least settings.offline_batch_threshold of the questions have no saved
+        concepts, those are extracted together through the provider's offline batch
+        job; the rest, and any the job fails on, go through extract_and_save_key_concepts.
+        """
+        pending = list({q.question_id: q for q in questions}.values())
+        threshold = settings.offline_batch_threshold
+        if len(pending) >= threshold:
+            async with self.get_async_session() as session:
+                rows = (await session.execute(
+                    _SQL_QUESTIONS_WITH_KEY_CONCEPTS,
+                    {"ids": [q.question_id for q in pending]}
+                )).fetchall()
+            have_concepts = {r[0] for r in rows}
+            missing = [q for q in pending if q.question_id not in have_concepts]
+            if len(missing) >= threshold:
+                # The batch job can take hours; no connection is held while it runs
+                logger.info(f"Extracting key concepts for {len(missing)} questions through an offline batch job")
+                try:
+                    extracted = await llm_service.extract_key_concepts_offline({
+                        str(q.question_id): (q.ideal_answer, q.subject, q.topic)
+                        for q in missing
+                    })
+                except Exception as e:
+                    logger.error(f"Offline key concept extraction failed, falling back to live extraction: {e}")
+                    extracted = {}
+                
+                to_save = [(q, extracted.get(str(q.question_id))) for q in missing]
+                to_save = [(q, concepts_data) for q, concepts_data in to_save if concepts_data]
+                if to_save:
+                    now = datetime.now(timezone.utc).replace(tzinfo=None)
+                    saved: Dict[int, List[SimpleNamespace]] = {}
+                    async with self.get_async_session() as session, session.begin():
+                        for q, concepts_data in to_save:
+                            saved[q.question_id] = await self._save_key_concepts(session, q, concepts_data, now)
+                    for question_id, concepts in saved.items():
+                        question_concepts_cache.set(question_id, concepts)
+                    logger.info(f"Saved key concepts for {len(saved)} questions from the batch job")
+        
+        # Each live extraction holds a session across its LLM call, so at most
+        # db_pool_size run at once. Questions saved above are served from
+        # question_concepts_cache
+        pool_slots = asyncio.Semaphore(settings.db_pool_size)
+        
+        async def extract(question: SimpleNamespace) -> List[SimpleNamespace]:
+            async with pool_slots:
+                return await self.extract_and_save_key_concepts(question)
+        
+        outcomes = await asyncio.gather(
+            *(extract(q) for q in pending),
+            return_exceptions=True
+        )
+        return {q.question_id: outcome for q, outcome in zip(pending, outcomes)}
     
     # Step 3: Retrieve Student's Submitted Answer
-    async def get_student_answer(self, student_id: int, question_id: int) -> Optional[SimpleNamespace]:
+    async def get_student_answer(self, student_id: int, question_id: int, session: Optional[AsyncSession] = None) -> Optional[SimpleNamespace]:
         """Retrieve student's submitted answer via direct SQL"""
-        session = self.get_session()
+        owns_session = session is None
+        if owns_session:
+            session = self.get_async_session()
         try:
-            sql = text(
-                """
-                SELECT TOP 1 *
-                FROM Student_Answers
-                WHERE student_id = :student_id AND question_id = :question_id
-                """
-            )
-            row = session.execute(sql, {"student_id": student_id, "question_id": question_id}).fetchone()
+            # word_count falls back to the persisted word_count_calc column
+            # (docs/upgrade_database.sql), so no UPDATE/commit is needed here
+            row = (await session.execute(_SQL_GET_ANSWER, {"student_id": student_id, "question_id": question_id})).fetchone()
             if not row:
                 return None
             sa = _row_to_ns(row)
             
-            # Update word count if not set
-            if getattr(sa, "word_count", None) in (None, 0):
-                wc = len((sa.answer_text or "").split())
-                sa_pk = getattr(sa, "id", None)
-                if sa_pk is not None:
-                    session.execute(text("UPDATE Student_Answers SET word_count = :wc WHERE id = :id"), {"wc": wc, "id": sa_pk})
-                else:
-                    sa_alt_pk = getattr(sa, "answer_id", None)
-                    if sa_alt_pk is not None:
-                        session.execute(text("UPDATE Student_Answers SET word_count = :wc WHERE answer_id = :aid"), {"wc": wc, "aid": sa_alt_pk})
-                session.commit()
-                sa.word_count = wc
-            
             logger.info(f"Retrieved answer from student {student_id} for question {question_id}")
             
             return sa
@@ -170,237 +495,442 @@ class RAGService:
             logger.error(f"Database error retrieving student answer: {e}")
             return None
         finally:
-            session.close()
+            if owns_session:
+                await session.close()
+    
+    async def get_student_answers_bulk(self, question_id: int, student_ids: List[int], session: Optional[AsyncSession] = None) -> Dict[int, SimpleNamespace]:
+        """Retrieve several students' answers to one question in a single query, keyed by student_id"""
+        if not student_ids:
+            return {}
+        owns_session = session is None
+        if owns_session:
+            session = self.get_async_session()
+        try:
+            rows = (await session.execute(
+                _SQL_GET_ANSWERS_BULK,
+                {"question_id": question_id, "student_ids": list(set(student_ids))}
+            )).fetchall()
+            answers: Dict[int, SimpleNamespace] = {}
+            for row in rows:
+                # One answer per student, like get_student_answer
+                answers.setdefault(row.student_id, _row_to_ns(row))
+            
+            logger.info(f"Retrieved {len(answers)} answers for question {question_id}")
+            
+            return answers
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Database error retrieving student answers: {e}")
+            return {}
+        finally:
+            if owns_session:
+                await session.close()
     
     # Step 4: Grade and Save Results
-    async def grade_and_save_result(self, question: SimpleNamespace, student_answer: SimpleNamespace, key_concepts: List[SimpleNamespace]) -> Dict[str, Any]:
+    async def grade_and_save_result(self, question: SimpleNamespace, student_answer: SimpleNamespace, key_concepts: List[SimpleNamespace], semantic_analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Grade the student answer and save results using direct SQL queries.
+        A semantic_analysis already produced by a batched LLM call skips the per-answer one.
         """
-        session = self.get_session()
-        start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         
         try:
-            # Check if already graded
-            sa_pk = getattr(student_answer, "id", None)
-            if sa_pk is None:
-                sa_pk = getattr(student_answer, "answer_id", None)
-            existing_row = None
-            if sa_pk is not None:
-                existing_row = session.execute(
-                    text("SELECT TOP 1 * FROM grading_results WHERE student_answer_id = :sid"),
-                    {"sid": sa_pk}
-                ).fetchone()
-            if existing_row:
-                logger.info(f"Using existing grading result for student {student_answer.student_id}")
-                return await self._format_grading_response_raw(_row_to_ns(existing_row), session)
+            # grading_semaphore bounds concurrent gradings. Connections are only held for
+            # the short read and write steps, never across the LLM calls
+            async with grading_semaphore:
+                sa_pk = getattr(student_answer, "id", None)
+                if sa_pk is None:
+                    sa_pk = getattr(student_answer, "answer_id", None)
+                rubric_json = getattr(question, "rubric_json", None)
             
-            # Prepare key concepts data for LLM
-            concepts_data = []
-            for concept in key_concepts:
-                keywords = []
-                if getattr(concept, "keywords", None):
-                    try:
-                        keywords = json.loads(concept.keywords)
-                    except Exception:
-                        keywords = []
-                concepts_data.append({
-                    "concept": concept.concept_name,
-                    "importance": concept.importance_score,
-                    "keywords": keywords,
-                    "explanation": concept.concept_description,
-                    "max_points": concept.max_points
-                })
+                # Identical resubmissions, then near-identical answers to the same
+                # question, reuse an earlier grading
+                exact_key = answer_cache_key(question.question_id, student_answer.answer_text)
+                cached = _cached_grading(question.question_id, student_answer.answer_text)
+                if cached:
+                    logger.info(f"Grading cache hit for student {student_answer.student_id}, question {question.question_id}")
             
-            # Use LLM to analyze semantic similarity
-            semantic_analysis = await llm_service.analyze_semantic_similarity(
-                question.ideal_answer,
-                student_answer.answer_text,
-                concepts_data
-            )
+                # Existing result, duplicate grading and rubric are read in one short session
+                rubric_data = None
+                async with self.get_async_session() as session:
+                    # Check if already graded
+                    existing_row = None
+                    if sa_pk is not None:
+                        existing_row = (await session.execute(
+                            _SQL_GET_GRADING_RESULT,
+                            {"sid": sa_pk}
+                        )).fetchone()
+                    if existing_row:
+                        logger.info(f"Using existing grading result for student {student_answer.student_id}")
+                        return await self._format_grading_response_raw(_row_to_ns(existing_row), session)
+                    
+                    if not cached and sa_pk is not None:
+                        # Same answer graded by another process or before a restart
+                        duplicate = (await session.execute(_SQL_GET_DUPLICATE_GRADING, {"sid": sa_pk})).scalar()
+                        if duplicate is not None:
+                            cached = _decode_raw_llm_response(duplicate)
+                            if cached:
+                                logger.info(f"Duplicate answer hit for student {student_answer.student_id}, question {question.question_id}")
+                    if not cached:
+                        rubric_data = await self._load_rubric_data(session, question, key_concepts)
             
-            # Prepare rubric data (load from rubric_criteria if present)
-            rc_rows = []
-            internal_qid = getattr(question, "id", None)
-            if internal_qid is not None:
-                rc_rows = session.execute(
-                    text("SELECT * FROM rubric_criteria WHERE question_id = :qid"),
-                    {"qid": internal_qid}
-                ).fetchall()
-            if not rc_rows:
-                rubric_data = {
-                    "subject": question.subject,
-                    "topic": question.topic,
-                    "criteria": [
-                        {
-                            "name": c.concept_name,
-                            "description": c.concept_description,
-                            "max_points": c.max_points,
-                            "weight": c.importance_score
-                        }
-                        for c in key_concepts
-                    ],
-                    "total_max_points": question.max_marks,
-                    "passing_threshold": question.passing_threshold
-                }
-            else:
-                rubric_data = {
-                    "subject": question.subject,
-                    "topic": question.topic,
-                    "criteria": [
-                        {
-                            "name": r._mapping["criteria_name"],
-                            "description": r._mapping["criteria_description"],
-                            "max_points": r._mapping["max_points"],
-                            "weight": r._mapping["weight"],
-                        }
-                        for r in rc_rows
-                    ],
-                    "total_max_points": question.max_marks,
-                    "passing_threshold": question.passing_threshold
-                }
+                if cached:
+                    semantic_analysis, grading_result_data = cached
+                else:
+                    if semantic_analysis is None:
+                        # Prepare key concepts data for LLM
+                        concepts_data = [
+                            {
+                                "concept": concept.concept_name,
+                                "importance": concept.importance_score,
+                                "keywords": getattr(concept, "keywords", None) or [],
+                                "explanation": concept.concept_description,
+                                "max_points": concept.max_points
+                            }
+                            for concept in key_concepts
+                        ]
+                        semantic_analysis = await llm_service.analyze_semantic_similarity(
+                            question.ideal_answer,
+                            student_answer.answer_text,
+                            concepts_data
+                        )
             
-            # Apply grading rubric using LLM
-            grading_result_data = await llm_service.apply_grading_rubric(
-                question.ideal_answer,
-                student_answer.answer_text,
-                rubric_data,
-                semantic_analysis.get("concept_evaluations", []),
-                semantic_analysis
-            )
+                    # A confident semantic analysis over a concept-based rubric is scored
+                    # directly; otherwise apply the grading rubric using the LLM
+                    grading_result_data = None
+                    if settings.rubric_shortcut_enabled and not rubric_json:
+                        grading_result_data = self._confident_rubric_result(question, key_concepts, semantic_analysis, rubric_data)
+                    if grading_result_data is not None:
+                        logger.info(f"Scored student {student_answer.student_id} from semantic analysis (confident_shortcut=True)")
+                    else:
+                        grading_result_data = await llm_service.apply_grading_rubric(
+                            question.ideal_answer,
+                            student_answer.answer_text,
+                            rubric_data,
+                            semantic_analysis.get("concept_evaluations", []),
+                            semantic_analysis,
+                            rubric_json=rubric_json
+                        )
             
-            processing_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+                    if settings.exact_cache_enabled:
+                        exact_grade_cache.set(exact_key, (semantic_analysis, grading_result_data))
+                    if settings.semantic_cache_enabled:
+                        semantic_grade_cache.store(
+                            question.question_id,
+                            student_answer.answer_text,
+                            (semantic_analysis, grading_result_data),
+                        )
             
-            # Calculate scores
-            total_score = grading_result_data.get("total_score", 0)
-            percentage = grading_result_data.get("percentage", 0)
-            passed = grading_result_data.get("passed", percentage >= question.passing_threshold)
+                processing_time = (time.perf_counter_ns() - start_ns) / 1_000_000
             
-            # Insert grading result
-            result_uuid = str(uuid.uuid4())
-            insert_gr_sql = text(
-                """
-                INSERT INTO grading_results (
-                    result_id, student_answer_id, total_score, max_possible_score, percentage, passed,
-                    semantic_similarity, coherence_score, completeness_score, confidence_score,
-                    detailed_feedback, strengths, weaknesses, suggestions,
-                    grading_model, processing_time_ms, graded_at, graded_by, raw_llm_response, criteria_scores
-                )
-                OUTPUT INSERTED.id
-                VALUES (
-                    :result_id, :student_answer_id, :total_score, :max_possible_score, :percentage, :passed,
-                    :semantic_similarity, :coherence_score, :completeness_score, :confidence_score,
-                    :detailed_feedback, :strengths, :weaknesses, :suggestions,
-                    :grading_model, :processing_time_ms, GETUTCDATE(), :graded_by, :raw_llm_response, :criteria_scores
-                )
-                """
-            )
-            params = {
-                "result_id": result_uuid,
-                "student_answer_id": sa_pk,
-                "total_score": total_score,
-                "max_possible_score": question.max_marks,
-                "percentage": percentage,
-                "passed": passed,
-                "semantic_similarity": semantic_analysis.get("overall_semantic_similarity", 0),
-                "coherence_score": semantic_analysis.get("coherence_score", 0),
-                "completeness_score": semantic_analysis.get("completeness_score", 0),
-                "confidence_score": grading_result_data.get("confidence_score", 0.8),
-                "detailed_feedback": grading_result_data.get("detailed_feedback", ""),
-                "strengths": json.dumps(grading_result_data.get("strengths", [])),
-                "weaknesses": json.dumps(grading_result_data.get("weaknesses", [])),
-                "suggestions": json.dumps(grading_result_data.get("suggestions", [])),
-                "grading_model": settings.llm_model,
-                "processing_time_ms": processing_time,
-                "graded_by": "RAGService",
-                "raw_llm_response": json.dumps({"semantic_analysis": semantic_analysis, "grading_result": grading_result_data}),
-                "criteria_scores": json.dumps(grading_result_data.get("criteria_scores", {})),
-            }
-            gr_row = session.execute(insert_gr_sql, params).fetchone()
-            grading_result_id = gr_row[0] if gr_row else None
+                # Calculate scores: total_score is authoritative, percentage/passed are
+                # derived from it whenever the LLM leaves them out
+                total_score = grading_result_data.get("total_score", 0)
+                percentage = grading_result_data.get("percentage")
+                if percentage is None:
+                    percentage = total_score * 100.0 / question.max_marks if question.max_marks else 0.0
+                passed = grading_result_data.get("passed", percentage >= question.passing_threshold)
             
-            # Create concept evaluations
-            concept_evaluations_data = []
-            for c in key_concepts:
-                # Find matching concept evaluation from LLM response
-                concept_eval_data = None
-                for eval_data in semantic_analysis.get("concept_evaluations", []):
-                    if eval_data.get("concept", "").lower() in c.concept_name.lower():
-                        concept_eval_data = eval_data
-                        break
-                if not concept_eval_data:
-                    concept_eval_data = {"present": False, "accuracy_score": 0.0, "explanation": "Concept not found in student answer", "evidence": None}
-                points_awarded = concept_eval_data["accuracy_score"] * c.max_points
-                session.execute(text(
-                    """
-                    INSERT INTO Concept_Evaluations (
-                        grading_result_id, key_concept_id, present, accuracy_score, points_awarded, points_possible,
-                        explanation, evidence_text, reasoning, evaluated_at
-                    ) VALUES (
-                        :grading_result_id, :key_concept_id, :present, :accuracy_score, :points_awarded, :points_possible,
-                        :explanation, :evidence_text, :reasoning, GETUTCDATE()
+                # Build concept evaluations
+                key_concepts_covered = []
+                evaluations_params = []
+                matched_evals = [
+                    e or _MISSING_EVALUATION
+                    for e in _match_concept_evaluations(key_concepts, semantic_analysis.get("concept_evaluations", []))
+                ]
+                # Points for every concept in one vectorized multiply
+                n_concepts = len(key_concepts)
+                accs = np.fromiter((e["accuracy_score"] for e in matched_evals), dtype=np.float64, count=n_concepts)
+                maxp = np.fromiter((c.max_points for c in key_concepts), dtype=np.float64, count=n_concepts)
+                points = accs * maxp
+                append_evaluation = evaluations_params.append
+                append_covered = key_concepts_covered.append
+                for c, concept_eval_data, points_awarded, points_possible in zip(
+                    key_concepts, matched_evals, points.tolist(), maxp.tolist()
+                ):
+                    accuracy = concept_eval_data["accuracy_score"]
+                    explanation = concept_eval_data["explanation"]
+                    # Short keys keep the OPENJSON payload small; mapped in _SQL_INSERT_GRADING_RESULT
+                    append_evaluation({
+                        "k": c.key_id,
+                        "p": concept_eval_data["present"],
+                        "a": accuracy,
+                        "pa": points_awarded,
+                        "pp": points_possible,
+                        "e": explanation,
+                        "ev": concept_eval_data.get("evidence"),
+                        "r": f"Accuracy: {accuracy:.2f}, Points: {points_awarded:.1f}/{c.max_points}",
+                    })
+                    # Display string built once here, no intermediate per-concept dict
+                    append_covered(
+                        f"{c.concept_name} ({points_awarded:.1f}/{points_possible:.1f} points) - {explanation}"
                     )
-                    """
-                ), {
-                    "grading_result_id": grading_result_id,
-                    "key_concept_id": c.key_id,
-                    "present": concept_eval_data["present"],
-                    "accuracy_score": concept_eval_data["accuracy_score"],
-                    "points_awarded": points_awarded,
-                    "points_possible": c.max_points,
-                    "explanation": concept_eval_data["explanation"],
-                    "evidence_text": concept_eval_data.get("evidence"),
-                    "reasoning": f"Accuracy: {concept_eval_data['accuracy_score']:.2f}, Points: {points_awarded:.1f}/{c.max_points}",
-                })
-                concept_evaluations_data.append({
-                    "concept": c.concept_name,
-                    "present": concept_eval_data["present"],
-                    "points_awarded": points_awarded,
-                    "points_possible": c.max_points,
-                    "reason": concept_eval_data["explanation"],
-                })
-            session.commit()
+            
+                # Insert grading result and its concept evaluations in one batch: the new
+                # id is captured with SCOPE_IDENTITY() and concept rows are expanded
+                # server-side from a single JSON parameter
+                result_uuid = str(uuid.uuid4())
+                response = {
+                    "Score": f"{total_score:.1f}/{question.max_marks}",
+                    "Justification": grading_result_data.get("detailed_feedback", ""),
+                    "Key_Concepts_Covered": key_concepts_covered,
+                    "Percentage": f"{percentage:.1f}%",
+                    "Passed": passed,
+                    "ProcessingTimeMs": processing_time,
+                    "ConfidenceScore": grading_result_data.get("confidence_score", 0.8),
+                    "GradingResultId": result_uuid,
+                }
+                _dumps = orjson.dumps
+                params = {
+                    "result_id": result_uuid,
+                    "student_answer_id": sa_pk,
+                    "total_score": total_score,
+                    "max_possible_score": question.max_marks,
+                    "percentage": percentage,
+                    "passed": passed,
+                    "semantic_similarity": semantic_analysis.get("overall_semantic_similarity", 0),
+                    "coherence_score": semantic_analysis.get("coherence_score", 0),
+                    "completeness_score": semantic_analysis.get("completeness_score", 0),
+                    "confidence_score": grading_result_data.get("confidence_score", 0.8),
+                    "detailed_feedback": grading_result_data.get("detailed_feedback", ""),
+                    "strengths": _dumps(grading_result_data.get("strengths", [])).decode(),
+                    "weaknesses": _dumps(grading_result_data.get("weaknesses", [])).decode(),
+                    "suggestions": _dumps(grading_result_data.get("suggestions", [])).decode(),
+                    "grading_model": settings.llm_model,
+                    "processing_time_ms": processing_time,
+                    "graded_by": "RAGService",
+                    # gzip of the UTF-16LE JSON, the same format as T-SQL COMPRESS(N'...'), so
+                    # CAST(DECOMPRESS(raw_llm_response) AS NVARCHAR(MAX)) reads it back
+                    "raw_llm_response": gzip.compress(
+                        _dumps(
+                            {"semantic_analysis": semantic_analysis, "grading_result": grading_result_data},
+                            option=orjson.OPT_SERIALIZE_NUMPY,
+                        ).decode().encode("utf-16-le"),
+                        compresslevel=6,
+                        mtime=0,
+                    ),
+                    "criteria_scores": _dumps(grading_result_data.get("criteria_scores", {})).decode(),
+                    "concept_evaluations": _dumps(evaluations_params).decode(),
+                    # Returned as-is when this answer is requested again
+                    "response_json": _dumps(response).decode(),
+                }
+                if self.result_writer is not None and self.result_writer.running:
+                    # Committed in the background; the response does not wait on the log flush
+                    self.result_writer.submit(_SQL_INSERT_GRADING_RESULT, params)
+                else:
+                    # Short write transaction; session.begin() commits on success and
+                    # rolls back on any exception
+                    async with self.get_async_session() as session, session.begin():
+                        await session.execute(_SQL_INSERT_GRADING_RESULT, params)
                        
-            response = {
-                "Score": f"{total_score:.1f}/{question.max_marks}",
-                "Justification": grading_result_data.get("detailed_feedback", ""),
-                "Key_Concepts_Covered": [
-                    f"{ev['concept']} ({ev['points_awarded']:.1f}/{ev['points_possible']:.1f} points) - {ev['reason']}"
-                    for ev in concept_evaluations_data
-                ],
-                "Percentage": f"{percentage:.1f}%",
-                "Passed": passed,
-                "ProcessingTimeMs": processing_time,
-                "ConfidenceScore": grading_result_data.get("confidence_score", 0.8),
-                "GradingResultId": result_uuid,
-            }
-            logger.info(f"Successfully graded answer for student {student_answer.student_id}: {total_score:.1f}/{question.max_marks}")
-            return response
+                logger.info(f"Successfully graded answer for student {student_answer.student_id}: {total_score:.1f}/{question.max_marks}")
+                return response
         except Exception as e:
-            session.rollback()
             logger.error(f"Error grading student answer: {e}")
 
             raise
-        finally:
-            session.close()
 
-    async def _format_grading_response_raw(self, grading_result: SimpleNamespace, session: Session) -> Dict[str, Any]:
+    # Step 4 (batch): Grade several answers to one question
+    async def grade_batch(self, question: SimpleNamespace, student_answers: List[SimpleNamespace], key_concepts: List[SimpleNamespace], on_result: Optional[Callable[[int], None]] = None) -> List[Any]:
+        """
+        Grade answers to the same question, packing up to settings.llm_batch_size of them
+        into each semantic-analysis LLM call. Returns one result (or exception) per answer, in order.
+        on_result, when given, receives each answer's index as soon as that answer is done.
+        """
+        # Answers that already have a grading result are not sent to the LLM
+        answer_ids = [getattr(a, "id", None) for a in student_answers]
+        graded_ids = set()
+        lookup_ids = [aid for aid in answer_ids if aid is not None]
+        if lookup_ids:
+            async with self.get_async_session() as session:
+                rows = (await session.execute(
+                    _SQL_GRADED_ANSWER_IDS,
+                    {"ids": lookup_ids}
+                )).fetchall()
+                graded_ids = {r[0] for r in rows}
+        pending = [i for i, aid in enumerate(answer_ids) if aid not in graded_ids]
+        
+        concepts_data = [
+            {
+                "concept": c.concept_name,
+                "importance": c.importance_score,
+                "keywords": getattr(c, "keywords", None) or [],
+                "explanation": c.concept_description,
+                "max_points": c.max_points
+            }
+            for c in key_concepts
+        ]
+        # Answers the grading caches already cover are not sent to the LLM, and
+        # identical answers in the batch share one analysis
+        to_analyze = []
+        first_by_text: Dict[str, int] = {}
+        duplicates: Dict[int, int] = {}
+        for i in pending:
+            answer_text = student_answers[i].answer_text
+            if _cached_grading(question.question_id, answer_text):
+                continue
+            if answer_text in first_by_text:
+                duplicates[i] = first_by_text[answer_text]
+            else:
+                first_by_text[answer_text] = i
+                to_analyze.append(i)
+        
+        analyses: Dict[int, Optional[Dict[str, Any]]] = {}
+        batch_size = max(1, settings.llm_batch_size)
+        chunks = [
+            chunk for chunk in (to_analyze[start:start + batch_size] for start in range(0, len(to_analyze), batch_size))
+            if len(chunk) >= 2
+        ]
+        # Chunks are independent, so all of them are in flight at once
+        chunk_results = await asyncio.gather(
+            *(
+                llm_service.analyze_semantic_similarity_batch(
+                    question.ideal_answer,
+                    [student_answers[i].answer_text for i in chunk],
+                    concepts_data
+                )
+                for chunk in chunks
+            ),
+            return_exceptions=True
+        )
+        for chunk, chunk_analyses in zip(chunks, chunk_results):
+            if isinstance(chunk_analyses, Exception):
+                # Answers in a failed batch fall back to individual semantic analysis
+                logger.warning(f"Batched semantic analysis failed for question {question.question_id}: {chunk_analyses}")
+            else:
+                analyses.update(zip(chunk, chunk_analyses))
+        for i, first in duplicates.items():
+            if first in analyses:
+                analyses[i] = analyses[first]
+        
+        logger.info(
+            f"Grading {len(student_answers)} answers for question {question.question_id} "
+            f"({len(analyses)} batched, {len(graded_ids)} already graded)"
+        )
+        async def grade(i: int, answer: SimpleNamespace) -> Dict[str, Any]:
+            try:
+                return await self.grade_and_save_result(question, answer, key_concepts, semantic_analysis=analyses.get(i))
+            finally:
+                if on_result:
+                    on_result(i)
+        
+        return await asyncio.gather(
+            *(grade(i, answer) for i, answer in enumerate(student_answers)),
+            return_exceptions=True
+        )
+    
+    def _confident_rubric_result(self, question: SimpleNamespace, key_concepts: List[SimpleNamespace], semantic_analysis: Dict[str, Any], rubric_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Score the answer from the semantic analysis alone when that is safe: the rubric
+        criteria are exactly the key concepts and every concept was evaluated with
+        confidence >= settings.rubric_shortcut_confidence. Returns None otherwise.
+        """
+        criteria_names = [c.get("name") for c in rubric_data.get("criteria", [])]
+        if not key_concepts or criteria_names != [c.concept_name for c in key_concepts]:
+            return None
+        
+        matched = _match_concept_evaluations(key_concepts, semantic_analysis.get("concept_evaluations", []))
+        threshold = settings.rubric_shortcut_confidence
+        if any(e is None or e.get("confidence", 0) < threshold for e in matched):
+            return None
+        
+        accs = np.fromiter((e["accuracy_score"] for e in matched), dtype=np.float64, count=len(matched))
+        maxp = np.fromiter((c.max_points for c in key_concepts), dtype=np.float64, count=len(key_concepts))
+        points = (accs * maxp).tolist()
+        total_score = float(sum(points))
+        max_score = float(question.max_marks)
+        percentage = total_score * 100.0 / max_score if max_score else 0.0
+        
+        order = np.argsort(accs).tolist()
+        strong = [i for i in reversed(order) if accs[i] >= 0.7][:3]
+        weak = [i for i in order if accs[i] < 0.7][:3]
+        strengths = [f"Clear understanding of {key_concepts[i].concept_name}" for i in strong]
+        weaknesses = [f"{key_concepts[i].concept_name} was missing or incomplete" for i in weak]
+        suggestions = [f"Review {key_concepts[i].concept_name}: {key_concepts[i].concept_description}" for i in weak]
+        
+        feedback = f"Scored {total_score:.1f}/{max_score:g} ({percentage:.1f}%)."
+        if strengths:
+            feedback += " Strengths: " + ", ".join(key_concepts[i].concept_name for i in strong) + "."
+        if weaknesses:
+            feedback += " To improve, focus on: " + ", ".join(key_concepts[i].concept_name for i in weak) + "."
+        
+        return {
+            "criteria_scores": {c.concept_name: round(p, 2) for c, p in zip(key_concepts, points)},
+            "total_score": total_score,
+            "max_possible_score": max_score,
+            "percentage": percentage,
+            "passed": percentage >= question.passing_threshold,
+            "strengths": strengths,
+            "weaknesses": weaknesses,
+            "suggestions": suggestions,
+            "detailed_feedback": feedback,
+            "confidence_score": min(e.get("confidence", 0) for e in matched),
+            "grading_mode": "confident_shortcut",
+        }
+    
+    async def _load_rubric_data(self, session: AsyncSession, question: SimpleNamespace, key_concepts: List[SimpleNamespace]) -> Dict[str, Any]:
+        """Build the rubric passed to the grading LLM, cached per question.
+
+        A precomputed Question_Bank.rubric_json is passed to the LLM as-is,
+        otherwise criteria come from rubric_criteria, falling back to the key
+        concepts. The returned dict is shared between calls; do not mutate it.
+        """
+        if getattr(question, "rubric_json", None):
+            return {"passing_threshold": question.passing_threshold}
+
+        rubric_data = rubric_cache.get(question.question_id)
+        if rubric_data is not None:
+            return rubric_data
+
+        rc_rows = []
+        internal_qid = getattr(question, "id", None)
+        if internal_qid is not None:
+            rc_rows = (await session.execute(
+                _SQL_GET_RUBRIC_CRITERIA,
+                {"qid": internal_qid}
+            )).fetchall()
+        if not rc_rows:
+            criteria = [
+                {
+                    "name": c.concept_name,
+                    "description": c.concept_description,
+                    "max_points": c.max_points,
+                    "weight": c.importance_score
+                }
+                for c in key_concepts
+            ]
+        else:
+            criteria = [
+                {
+                    "name": r._mapping["criteria_name"],
+                    "description": r._mapping["criteria_description"],
+                    "max_points": r._mapping["max_points"],
+                    "weight": r._mapping["weight"],
+                }
+                for r in rc_rows
+            ]
+        rubric_data = {
+            "subject": question.subject,
+            "topic": question.topic,
+            "criteria": criteria,
+            "total_max_points": question.max_marks,
+            "passing_threshold": question.passing_threshold
+        }
+        rubric_cache.set(question.question_id, rubric_data)
+        return rubric_data
+
+    async def _format_grading_response_raw(self, grading_result: SimpleNamespace, session: AsyncSession) -> Dict[str, Any]:
         """Format existing grading result (raw SQL) into the required response format"""
-        rows = session.execute(text(
-            """
-            SELECT ce.*, kc.concept_name, kc.max_points
-            FROM Concept_Evaluations ce
-            INNER JOIN Question_KeyConcept kc ON ce.key_concept_id = kc.key_id
-            WHERE ce.grading_result_id = :gid
-            ORDER BY ce.id ASC
-            """
-        ), {"gid": grading_result.id}).fetchall()
-        key_concepts_covered = []
-        for row in rows:
-            m = row._mapping if hasattr(row, "_mapping") else row
-            key_concepts_covered.append(
-                f"{m['concept_name']} ({m['points_awarded']:.1f}/{m['points_possible']:.1f} points) - {m['explanation']}"
-            )
+        stored = getattr(grading_result, "response_json", None)
+        if stored:
+            return stored
+        
+        # Rows graded before response_json existed are rebuilt from their concept evaluations
+        rows = (await session.execute(_SQL_GET_CONCEPT_EVALUATIONS, {"gid": grading_result.id})).fetchall()
+        key_concepts_covered = [
+            f"{row.concept_name} ({row.points_awarded:.1f}/{row.points_possible:.1f} points) - {row.explanation}"
+            for row in rows
+        ]
         return {
             "Score": f"{grading_result.total_score:.1f}/{grading_result.max_possible_score}",
             "Justification": grading_result.detailed_feedback,
@@ -0,0 +1,91 @@
+"""
+Write-behind queue for the AI Examiner System
+Defers idempotent INSERTs off the request path and commits them in batches
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.sql.elements import TextClause
+
+from src.utils.database_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindWriter:
+    """Background task that commits queued statements in batches.
+
+    Statements must be idempotent (guarded by a natural key) so a batch that is
+    retried row by row after a failure never writes a row twice.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, batch_size: int = 50, flush_interval: float = 0.2):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "asyncio.Queue[Optional[Tuple[TextClause, Dict[str, Any]]]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background flush loop on the running event loop"""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Write-behind writer started")
+
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the background loop"""
+        if self._task is not None:
+            # Sentinel rather than cancel, so a batch already taken off the queue is not lost
+            self._queue.put_nowait(None)
+            await self._task
+            self._task = None
+        logger.info("Write-behind writer stopped")
+
+    def submit(self, statement: TextClause, params: Dict[str, Any]) -> None:
+        """Queue a statement for the next batch commit"""
+        self._queue.put_nowait((statement, params))
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            batch = []
+            if first is None:
+                stopping = True
+            else:
+                batch.append(first)
+                await asyncio.sleep(self.flush_interval)
+            # On stop, drain everything that is left
+            while (stopping or len(batch) < self.batch_size) and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    await self._flush(batch)
+                    batch = []
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[TextClause, Dict[str, Any]]]) -> None:
+        if not batch:
+            return
+        try:
+            async with self.db_manager.get_async_session() as session, session.begin():
+                for statement, params in batch:
+                    await session.execute(statement, params)
+            logger.debug(f"Write-behind committed {len(batch)} statements")
+        except Exception as e:
+            # Retry row by row so one bad row does not drop the rest of the batch
+            logger.error(f"Write-behind batch of {len(batch)} failed, retrying individually: {e}")
+            for statement, params in batch:
+                try:
+                    async with self.db_manager.get_async_session() as session, session.begin():
+                        await session.execute(statement, params)
+                except Exception as row_error:
+                    logger.error(f"Write-behind dropped statement after retry: {row_error}")
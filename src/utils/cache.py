@@ -0,0 +1,278 @@
+"""
+In-process caches for the AI Examiner System
+"""
+import hashlib
+import logging
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+import orjson
+
+from src.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def embed_text(text: str, dim: int = 384) -> np.ndarray:
+    """Embed text into a unit-length float32 vector using the hashing trick.
+
+    Unigrams and bigrams are hashed into ``dim`` buckets with a signed crc32,
+    so paraphrases sharing most of their wording land close in cosine space
+    without loading an embedding model.
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    tokens = _TOKEN_RE.findall((text or "").lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace runs to single spaces and trim; case is kept ("pH" is not "PH")"""
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+
+def prompt_cache_key(model: str, prompt: str, system_prompt: Optional[str], temperature: Optional[float], max_tokens: Optional[int], json_mode: bool) -> str:
+    """SHA-256 key for an LLM request, insensitive to whitespace differences in the prompts"""
+    payload = orjson.dumps({
+        "m": model,
+        "p": _WHITESPACE_RE.sub(" ", prompt).strip(),
+        "s": _WHITESPACE_RE.sub(" ", system_prompt or "").strip(),
+        "t": temperature,
+        "mt": max_tokens,
+        "j": json_mode,
+    }, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+
+def answer_cache_key(question_id: Any, answer_text: str) -> str:
+    """SHA-256 key for an exact (question, answer text) pair, insensitive to whitespace differences
+    
+    Normalized like the Student_Answers.answer_hash column.
+    """
+    return hashlib.sha256(f"{question_id}|{normalize_text(answer_text)}".encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after ``ttl_seconds``"""
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 600):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, ts = item
+        if time.monotonic() - ts > self.ttl_seconds:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (value, time.monotonic())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SemanticGradeCache:
+    """Per-question cache of grading results keyed on answer-text similarity"""
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries_per_key: int = 128,
+        ttl_seconds: float = 86400,
+        dim: int = 384,
+    ):
+        self.threshold = threshold
+        self.max_entries_per_key = max_entries_per_key
+        self.ttl_seconds = ttl_seconds
+        self.dim = dim
+        self._entries: Dict[Hashable, "OrderedDict[int, tuple]"] = {}
+        self._next_id = 0
+
+    def lookup(self, key: Hashable, text: str) -> Optional[Any]:
+        """Return the cached value for the most similar answer, if above threshold"""
+        bucket = self._entries.get(key)
+        if not bucket:
+            return None
+
+        now = time.monotonic()
+        expired = [eid for eid, (_, _, ts) in bucket.items() if now - ts > self.ttl_seconds]
+        for eid in expired:
+            del bucket[eid]
+        if not bucket:
+            return None
+
+        ids = list(bucket.keys())
+        matrix = np.stack([bucket[eid][0] for eid in ids])
+        sims = matrix @ embed_text(text, self.dim)
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+
+        bucket.move_to_end(ids[best])
+        return bucket[ids[best]][1]
+
+    def store(self, key: Hashable, text: str, value: Any) -> None:
+        """Cache a value for an answer, evicting the least recently used entry when full"""
+        bucket = self._entries.setdefault(key, OrderedDict())
+        bucket[self._next_id] = (embed_text(text, self.dim), value, time.monotonic())
+        self._next_id += 1
+        while len(bucket) > self.max_entries_per_key:
+            bucket.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SharedResponseCache:
+    """Cross-process string cache in Redis, the second tier behind the in-process caches.
+
+    Without a URL every lookup misses. Redis errors are logged and treated as
+    misses, so an unavailable Redis only costs the short socket timeout.
+    """
+
+    def __init__(self, url: Optional[str], ttl_seconds: float, timeout_seconds: float = 0.5, prefix: str = "llm:"):
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._client = None
+        if url:
+            import redis.asyncio as redis_asyncio
+
+            self._client = redis_asyncio.from_url(
+                url,
+                decode_responses=True,
+                socket_timeout=timeout_seconds,
+                socket_connect_timeout=timeout_seconds,
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self._client is not None
+
+    async def get(self, key: str) -> Optional[str]:
+        if self._client is None:
+            return None
+        try:
+            return await self._client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Shared cache lookup failed: {e}")
+            return None
+
+    async def set(self, key: str, value: str) -> None:
+        if self._client is None:
+            return
+        try:
+            await self._client.set(self.prefix + key, value, ex=int(self.ttl_seconds))
+        except Exception as e:
+            logger.warning(f"Shared cache store failed: {e}")
+
+    async def delete(self, key: str) -> None:
+        if self._client is None:
+            return
+        try:
+            await self._client.delete(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed: {e}")
+
+
+# Global semantic grading cache
+semantic_grade_cache = SemanticGradeCache(
+    threshold=settings.semantic_cache_threshold,
+    max_entries_per_key=settings.semantic_cache_max_entries,
+    ttl_seconds=settings.semantic_cache_ttl_seconds,
+)
+
+# Global rubric cache keyed on question_id
+rubric_cache = TTLCache(
+    maxsize=settings.rubric_cache_max_entries,
+    ttl_seconds=settings.rubric_cache_ttl_seconds,
+)
+
+# Global exact-answer grading cache keyed on answer_cache_key()
+exact_grade_cache = TTLCache(
+    maxsize=settings.exact_cache_max_entries,
+    ttl_seconds=settings.exact_cache_ttl_seconds,
+)
+
+# Global cache of key concepts extracted by fused grading, keyed on the ideal answer content hash
+key_concept_cache = TTLCache(
+    maxsize=settings.key_concept_cache_max_entries,
+    ttl_seconds=settings.key_concept_cache_ttl_seconds,
+)
+
+# Global question cache keyed on question_id (RAG workflow question rows)
+question_cache = TTLCache(
+    maxsize=settings.question_cache_max_entries,
+    ttl_seconds=settings.question_cache_ttl_seconds,
+)
+
+# Global Question model cache keyed on question_id (get_question_by_id)
+question_model_cache = TTLCache(
+    maxsize=settings.question_cache_max_entries,
+    ttl_seconds=settings.question_cache_ttl_seconds,
+)
+
+# Global cross-process Question model cache (Redis), behind question_model_cache
+question_shared_cache = SharedResponseCache(
+    settings.question_cache_redis_url,
+    ttl_seconds=settings.question_cache_ttl_seconds,
+    timeout_seconds=settings.llm_cache_redis_timeout_seconds,
+    prefix="question:",
+)
+
+# Global saved key concept cache keyed on question_id
+question_concepts_cache = TTLCache(
+    maxsize=settings.question_cache_max_entries,
+    ttl_seconds=settings.question_cache_ttl_seconds,
+)
+
+# Global LLM response cache keyed on (model, sampling settings, system prompt hash)
+llm_response_cache = SemanticGradeCache(
+    threshold=settings.llm_cache_threshold,
+    max_entries_per_key=settings.llm_cache_max_entries,
+    ttl_seconds=settings.llm_cache_ttl_seconds,
+)
+
+# Global exact LLM response cache keyed on prompt_cache_key()
+llm_exact_cache = TTLCache(
+    maxsize=settings.llm_exact_cache_max_entries,
+    ttl_seconds=settings.llm_exact_cache_ttl_seconds,
+)
+
+# Global cross-process LLM response cache (Redis), keyed on prompt_cache_key()
+llm_shared_cache = SharedResponseCache(
+    settings.llm_cache_redis_url,
+    ttl_seconds=settings.llm_exact_cache_ttl_seconds,
+    timeout_seconds=settings.llm_cache_redis_timeout_seconds,
+)
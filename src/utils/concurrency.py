@@ -0,0 +1,130 @@
+"""
+Concurrency controls for the AI Examiner System
+"""
+import asyncio
+import time
+from typing import Optional, Tuple, Type
+
+from src.utils.config import settings
+
+
+class AsyncRateLimiter:
+    """Token bucket allowing ``max_rate`` acquisitions per ``time_period`` seconds.
+
+    A non-positive ``max_rate`` disables limiting.
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 60.0):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._tokens = float(max_rate)
+        self._last = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.max_rate),
+            self._tokens + (now - self._last) * self.max_rate / self.time_period,
+        )
+        self._last = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        if self.max_rate <= 0:
+            return
+        # A single request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.max_rate)
+        while True:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return
+            await asyncio.sleep((amount - self._tokens) * self.time_period / self.max_rate)
+
+    async def __aenter__(self) -> "AsyncRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open"""
+    pass
+
+
+class CircuitBreaker:
+    """Async context manager that fails fast while a dependency is down.
+
+    After ``fail_max`` consecutive failures (exceptions of ``failure_types``) the
+    circuit opens and calls raise CircuitOpenError immediately. Once
+    ``reset_timeout`` seconds have passed a single probe call is let through
+    (half-open): success closes the circuit, failure opens it again. Other
+    exceptions mean the dependency answered and count as success. A
+    non-positive ``fail_max`` disables the breaker.
+    """
+
+    def __init__(
+        self,
+        fail_max: int = 5,
+        reset_timeout: float = 30.0,
+        failure_types: Tuple[Type[BaseException], ...] = (Exception,),
+        name: str = "circuit",
+    ):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failure_types = failure_types
+        self.name = name
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None and (
+            self._probing or time.monotonic() - self._opened_at < self.reset_timeout
+        )
+
+    async def __aenter__(self) -> "CircuitBreaker":
+        if self.fail_max <= 0 or self._opened_at is None:
+            return self
+        if self.is_open:
+            raise CircuitOpenError(f"{self.name} circuit breaker is open")
+        # Half-open: this call is the probe, everyone else keeps failing fast
+        self._probing = True
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        if self.fail_max <= 0:
+            return False
+        if exc_type is not None and not issubclass(exc_type, Exception):
+            # Cancelled probe: allow another one
+            self._probing = False
+        elif exc_type is not None and issubclass(exc_type, self.failure_types):
+            self._failures += 1
+            if self._probing or self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+            self._probing = False
+        else:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+        return False
+
+
+# Bounds concurrently running gradings (LLM calls + DB sessions)
+grading_semaphore = asyncio.Semaphore(settings.grade_max_concurrency)
+
+# Bounds LLM requests in flight at once, across all gradings
+llm_concurrency = asyncio.Semaphore(settings.llm_max_concurrency)
+
+# Requests-per-minute budget for the LLM provider
+llm_rate_limiter = AsyncRateLimiter(settings.llm_rpm, 60)
+
+# Tokens-per-minute budget for the LLM provider (prompt + completion estimate)
+llm_token_limiter = AsyncRateLimiter(settings.llm_tpm, 60)
+
+
+def estimate_tokens(prompt: str, max_tokens: int = 0) -> int:
+    """Rough token count for a request: ~4 characters per prompt token plus the completion cap"""
+    return len(prompt) // 4 + max_tokens
@@ -25,6 +25,9 @@ class Settings(BaseSettings):
     db_password: str = Field("abc@123", env="DB_PASSWORD")
     db_driver: str = Field("ODBC Driver 17 for SQL Server", env="DB_DRIVER")
     use_windows_auth: bool = Field(True, env="USE_WINDOWS_AUTH")
+    db_pool_size: int = Field(20, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(30, env="DB_MAX_OVERFLOW")
+    db_pool_warmup: bool = Field(True, env="DB_POOL_WARMUP")
     
     # Application Settings
     debug: bool = Field(False, env="DEBUG")
@@ -37,6 +40,60 @@ class Settings(BaseSettings):
     concept_extraction_temperature: float = Field(0.1, env="CONCEPT_EXTRACTION_TEMPERATURE")
     grading_temperature: float = Field(0.2, env="GRADING_TEMPERATURE")
     max_retries: int = Field(3, env="MAX_RETRIES")
+    llm_batch_size: int = Field(8, env="LLM_BATCH_SIZE")
+    multi_answer_pack_size: int = Field(4, env="MULTI_ANSWER_PACK_SIZE")
+    rubric_shortcut_enabled: bool = Field(True, env="RUBRIC_SHORTCUT_ENABLED")
+    rubric_shortcut_confidence: float = Field(0.9, env="RUBRIC_SHORTCUT_CONFIDENCE")
+    # Answers shorter than this score zero without an LLM call; 0 only skips blank
+    # answers, since correct answers can be a single word ("Paris", "H2O")
+    min_answer_chars: int = Field(0, env="MIN_ANSWER_CHARS")
+    grade_max_concurrency: int = Field(16, env="GRADE_MAX_CONCURRENCY")
+    llm_rpm: int = Field(60, env="LLM_RPM")
+    llm_tpm: int = Field(200000, env="LLM_TPM")
+    llm_max_concurrency: int = Field(32, env="LLM_MAX_CONCURRENCY")
+    llm_stream_responses: bool = Field(True, env="LLM_STREAM_RESPONSES")
+    llm_timeout_seconds: float = Field(60.0, env="LLM_TIMEOUT_SECONDS")
+    llm_max_connections: int = Field(200, env="LLM_MAX_CONNECTIONS")
+    llm_max_keepalive_connections: int = Field(100, env="LLM_MAX_KEEPALIVE_CONNECTIONS")
+    llm_keepalive_expiry_seconds: float = Field(300.0, env="LLM_KEEPALIVE_EXPIRY_SECONDS")
+    llm_connect_timeout_seconds: float = Field(10.0, env="LLM_CONNECT_TIMEOUT_SECONDS")
+    llm_http2: bool = Field(True, env="LLM_HTTP2")
+    llm_circuit_fail_max: int = Field(5, env="LLM_CIRCUIT_FAIL_MAX")
+    llm_circuit_reset_seconds: float = Field(30.0, env="LLM_CIRCUIT_RESET_SECONDS")
+    grading_write_behind: bool = Field(False, env="GRADING_WRITE_BEHIND")
+    write_behind_batch_size: int = Field(50, env="WRITE_BEHIND_BATCH_SIZE")
+    write_behind_flush_ms: int = Field(200, env="WRITE_BEHIND_FLUSH_MS")
+    offline_batch_threshold: int = Field(25, env="OFFLINE_BATCH_THRESHOLD")
+    offline_batch_poll_seconds: int = Field(30, env="OFFLINE_BATCH_POLL_SECONDS")
+    offline_batch_timeout_seconds: int = Field(86400, env="OFFLINE_BATCH_TIMEOUT_SECONDS")
+    
+    # Semantic Grading Cache (off until backed by a sentence-embedding model;
+    # the hashing-trick embedding matches wording, not meaning)
+    semantic_cache_enabled: bool = Field(False, env="SEMANTIC_CACHE_ENABLED")
+    semantic_cache_threshold: float = Field(0.92, env="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_max_entries: int = Field(128, env="SEMANTIC_CACHE_MAX_ENTRIES")
+    semantic_cache_ttl_seconds: int = Field(86400, env="SEMANTIC_CACHE_TTL_SECONDS")
+    rubric_cache_max_entries: int = Field(1024, env="RUBRIC_CACHE_MAX_ENTRIES")
+    rubric_cache_ttl_seconds: int = Field(600, env="RUBRIC_CACHE_TTL_SECONDS")
+    exact_cache_enabled: bool = Field(True, env="EXACT_CACHE_ENABLED")
+    exact_cache_max_entries: int = Field(4096, env="EXACT_CACHE_MAX_ENTRIES")
+    exact_cache_ttl_seconds: int = Field(86400, env="EXACT_CACHE_TTL_SECONDS")
+    key_concept_cache_max_entries: int = Field(1024, env="KEY_CONCEPT_CACHE_MAX_ENTRIES")
+    key_concept_cache_ttl_seconds: int = Field(3600, env="KEY_CONCEPT_CACHE_TTL_SECONDS")
+    question_cache_max_entries: int = Field(1024, env="QUESTION_CACHE_MAX_ENTRIES")
+    question_cache_ttl_seconds: int = Field(300, env="QUESTION_CACHE_TTL_SECONDS")
+    question_cache_redis_url: Optional[str] = Field(None, env="QUESTION_CACHE_REDIS_URL")
+    llm_cache_enabled: bool = Field(True, env="LLM_CACHE_ENABLED")
+    # Near-duplicate prompt tier; off by default because lexical similarity
+    # cannot tell two student answers that differ in one key term apart
+    llm_semantic_cache_enabled: bool = Field(False, env="LLM_SEMANTIC_CACHE_ENABLED")
+    llm_cache_threshold: float = Field(0.95, env="LLM_CACHE_THRESHOLD")
+    llm_cache_max_entries: int = Field(256, env="LLM_CACHE_MAX_ENTRIES")
+    llm_cache_ttl_seconds: int = Field(3600, env="LLM_CACHE_TTL_SECONDS")
+    llm_exact_cache_max_entries: int = Field(4096, env="LLM_EXACT_CACHE_MAX_ENTRIES")
+    llm_exact_cache_ttl_seconds: int = Field(604800, env="LLM_EXACT_CACHE_TTL_SECONDS")
+    llm_cache_redis_url: Optional[str] = Field(None, env="LLM_CACHE_REDIS_URL")
+    llm_cache_redis_timeout_seconds: float = Field(0.5, env="LLM_CACHE_REDIS_TIMEOUT_SECONDS")
     
     # API Configuration
     api_host: str = Field("0.0.0.0", env="API_HOST")
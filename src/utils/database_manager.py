@@ -1,9 +1,35 @@
 """
 SQLAlchemy Database Manager for MSSQL Server Integration (raw SQL usage)
 """
-from sqlalchemy import create_engine
+import asyncio
+import orjson
+from sqlalchemy import create_engine, text
+from sqlalchemy.types import TypeDecorator, UnicodeText
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from src.utils.config import settings
+
+
+# NVARCHAR(MAX) column holding JSON, decoded once at row-fetch
+class JSONText(TypeDecorator):
+    impl = UnicodeText
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return orjson.dumps(value).decode()
+
+    def process_result_value(self, value, dialect):
+        if not value:
+            return None
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
+            return None
+
 
 # Database connection and session management
 class DatabaseManager:
@@ -12,21 +38,49 @@ class DatabaseManager:
         self.connection_string = connection_string
         self.engine = None
         self.SessionLocal = None
+        self.async_engine = None
+        self.AsyncSessionLocal = None
         self.initialize_database()
     
     def initialize_database(self):
         """Initialize database connection"""
         try:
+            # pyodbc sends executemany batches as parameter arrays in one round-trip
+            driver_kwargs = {}
+            if make_url(self.connection_string).drivername == "mssql+pyodbc":
+                driver_kwargs["fast_executemany"] = True
+            
+            # LIFO hands out the most recently used connection, so bursts reuse warm
+            # connections and idle overflow ones age out via pool_recycle
+            pool_kwargs = {
+                "pool_pre_ping": True,
+                "pool_recycle": 3600,
+                "pool_size": settings.db_pool_size,
+                "max_overflow": settings.db_max_overflow,
+                "pool_use_lifo": True,
+            }
+            
             self.engine = create_engine(
                 self.connection_string,
                 echo=False,  # Set to True for SQL debugging
-                pool_pre_ping=True,
-                pool_recycle=3600
+                **pool_kwargs,
+                **driver_kwargs
             )
             
             # Create session factory
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
             
+            # Async engine (aioodbc) so async service methods don't block the event loop
+            self.async_engine = create_async_engine(
+                self._async_connection_url(self.connection_string),
+                echo=False,
+                **pool_kwargs,
+                **driver_kwargs
+            )
+            self.AsyncSessionLocal = async_sessionmaker(
+                bind=self.async_engine, autoflush=False, expire_on_commit=False
+            )
+            
             print("Database initialized successfully")
             
         except Exception as e:
@@ -40,10 +94,39 @@ class DatabaseManager:
         
         return self.SessionLocal()
     
+    def get_async_session(self) -> AsyncSession:
+        """Get an async database session"""
+        if not self.AsyncSessionLocal:
+            raise RuntimeError("Database not initialized")
+        
+        return self.AsyncSessionLocal()
+    
+    async def warm_up(self) -> None:
+        """Open pool_size async connections up front so the first requests skip connection setup"""
+        if not self.async_engine:
+            raise RuntimeError("Database not initialized")
+        
+        async def touch() -> None:
+            async with self.async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        
+        await asyncio.gather(*(touch() for _ in range(settings.db_pool_size)))
+    
+    @staticmethod
+    def _async_connection_url(connection_string: str):
+        """Map the sync pyodbc URL onto its aioodbc equivalent"""
+        url = make_url(connection_string)
+        if url.drivername == "mssql+pyodbc":
+            url = url.set(drivername="mssql+aioodbc")
+        return url
+    
     def close(self):
         """Close database connection"""
         if self.engine:
             self.engine.dispose()
+        if self.async_engine:
+            # AsyncEngine.dispose() is a coroutine; release the pool synchronously
+            self.async_engine.sync_engine.dispose()
 
 
 # Global database manager instance (will be initialized in config)
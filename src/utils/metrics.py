@@ -0,0 +1,28 @@
+"""
+OpenTelemetry metric instruments for the AI Examiner System
+Without a configured MeterProvider these are no-ops; configure the SDK and an
+exporter at deployment time to ship them out of process
+"""
+from opentelemetry import metrics
+
+_meter = metrics.get_meter("ai_examiner")
+
+# Duration of each LLM grading stage, tagged with {"stage": ...}
+llm_stage_duration = _meter.create_histogram(
+    "grade.llm.duration",
+    unit="ms",
+    description="Duration of an LLM grading stage",
+)
+
+# End-to-end duration of grade_answer
+grade_duration = _meter.create_histogram(
+    "grade.total.duration",
+    unit="ms",
+    description="Duration of a complete grading",
+)
+
+# LLM calls made while grading
+llm_calls = _meter.create_counter(
+    "grade.llm.calls",
+    description="LLM calls made while grading",
+)